@@ -0,0 +1,75 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import currency_codes
+from utils.analytics import RateMatrix
+
+##### Benchmark obliczeń wykresów: dotychczasowe groupby/lambda vs. RateMatrix (NumPy) #####
+
+##### Syntetyczna historia kursów: waluty × dni robocze (kolejność jak z bazy: code, effectiveDate) #####
+def make_frame(currencies: int, years: int) -> pd.DataFrame:
+    dates = pd.bdate_range("2015-01-01", periods=years * 252)
+    codes = currency_codes(currencies)
+    rng = np.random.default_rng(0)
+    values = np.cumprod(1 + rng.normal(0, 0.003, (len(codes), len(dates))), axis=1) * (1 + np.arange(len(codes)))[:, None]
+    df = pd.DataFrame({
+        "effectiveDate": np.tile(dates.to_numpy(), len(codes)),
+        "code": pd.Categorical(np.repeat(codes, len(dates))),
+        "mid": values.ravel(),
+    })
+    return df
+
+##### Dotychczasowe obliczenia z MainView.render #####
+def pandas_plots(df: pd.DataFrame, x: str = "mid"):
+    s = df.sort_values(["code", "effectiveDate"])
+    s.assign(change_pct=lambda d: d.groupby("code", observed=True)[x].pct_change() * 100)
+    s.assign(ma7=lambda d: d.groupby("code", observed=True)[x].transform(lambda v: v.rolling(7).mean()))
+    s.assign(change=lambda d: d.groupby("code", observed=True)[x].pct_change(),
+             volatility=lambda d: d.groupby("code", observed=True)["change"].transform(lambda v: v.rolling(7).std() * 100))
+    s.assign(strength=lambda d: d.groupby("code", observed=True)[x].transform(lambda v: v / v.iloc[0] * 100))
+    pivot = df.pivot(index="effectiveDate", columns="code", values=x)
+    pivot.corr()
+    codes = list(pivot.columns[:2])
+    two = df[df["code"].isin(codes)].pivot(index="effectiveDate", columns="code", values=x).dropna()
+    two[codes[0]] / two[codes[1]]
+
+##### Obliczenia wektorowe z utils.analytics #####
+def numpy_plots(df: pd.DataFrame, x: str = "mid"):
+    matrix = RateMatrix.from_frame(df, x)
+    ordered = df.iloc[matrix.order]
+    ordered.assign(change_pct=matrix.pct_change() * 100)
+    ordered.assign(ma7=matrix.rolling_mean(7))
+    change = matrix.pct_change()
+    ordered.assign(change=change, volatility=matrix.rolling_std(7, change) * 100)
+    ordered.assign(strength=matrix.strength())
+    matrix.correlation()
+    matrix.ratio(matrix.labels[0], matrix.labels[1])
+
+def measure(name, func, df, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(df)
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+    print(f"{name:8s} najlepszy czas {best * 1000:9.1f} ms")
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark obliczeń analitycznych wykresów.")
+    parser.add_argument("--currencies", type=int, default=35)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_frame(args.currencies, args.years)
+    print(f"Wiersze: {len(df)} ({args.currencies} walut × {args.years} lat)")
+    before = measure("pandas", pandas_plots, df, args.repeat)
+    after = measure("numpy", numpy_plots, df, args.repeat)
+    print(f"Przyspieszenie: {before / after:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import argparse
+import time
+from datetime import date, timedelta
+
+from benchmarks.synthetic import make_payload
+from config.init_settings import init_settings
+from services.sql_service import SqlService
+from utils.json_to_model import json_to_model
+
+##### Benchmark zapisu tabel: ścieżka wiersz po wierszu vs. bulk_upsert_tables (lokalna baza SQL Server) #####
+
+##### Usuwa z bazy tabele wygenerowane przez benchmark #####
+def cleanup(sql_service: SqlService, prefix: str):
+    with sql_service.pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""DELETE r FROM [NBP].[Rates] r
+                          JOIN [NBP].[Tables] t ON r.[tableId] = t.[id]
+                          WHERE t.[no] LIKE ?""", (f"{prefix}%",))
+        cursor.execute("DELETE FROM [NBP].[Tables] WHERE [no] LIKE ?", (f"{prefix}%",))
+        conn.commit()
+        cursor.close()
+
+##### Generuje tabele C z unikalnym prefiksem numeru tabeli #####
+def make_tables(prefix: str, days: int, currencies: int):
+    end = date.today()
+    payload = make_payload("C", end - timedelta(days=days - 1), end, currencies)
+    for item in payload:
+        item["no"] = f"{prefix}{item['no']}"[:20]
+    return [json_to_model(item) for item in payload]
+
+##### Zapis wiersz po wierszu (dotychczasowa ścieżka synchronizacji) #####
+def insert_row_by_row(sql_service: SqlService, tables) -> None:
+    for table in tables:
+        if sql_service.table_exists(table):
+            continue
+        id = sql_service.insert_table(table)
+        for rate in table.rates:
+            if sql_service.rate_exists(id, rate):
+                continue
+            sql_service.insert_rate(id, rate)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark zapisu tabel NBP do bazy danych.")
+    parser.add_argument("--connection-string", default=None)
+    parser.add_argument("--days", type=int, default=93)
+    parser.add_argument("--currencies", type=int, default=13)
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    connection_string = args.connection_string or init_settings()["database"]["connection_string"]
+    sql_service = SqlService(connection_string)
+
+    results = {}
+    for name in ("row_by_row", "bulk"):
+        prefix = f"BENCH{name[0].upper()}/"
+        cleanup(sql_service, prefix)
+        tables = make_tables(prefix, args.days, args.currencies)
+        rows = sum(len(t.rates) for t in tables) + len(tables)
+
+        started = time.perf_counter()
+        if name == "row_by_row":
+            insert_row_by_row(sql_service, tables)
+        else:
+            for i in range(0, len(tables), args.batch_size):
+                sql_service.bulk_upsert_tables(tables[i:i + args.batch_size])
+        elapsed = time.perf_counter() - started
+
+        results[name] = rows / elapsed
+        print(f"{name:12s} {rows:8d} wierszy w {elapsed:8.3f} s -> {rows / elapsed:10.0f} wierszy/s")
+        cleanup(sql_service, prefix)
+
+    print(f"Przyspieszenie: {results['bulk'] / results['row_by_row']:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+import argparse
+import copy
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from benchmarks.nbp_stub_server import start_stub_server
+from benchmarks.synthetic import make_payload
+from config.init_settings import init_settings
+from services.plot_cache import PlotCache
+from services.rate_store import RateStore
+from services.read_cache import ReadCache
+from services.sync_service import SyncService
+from utils.analytics import RateMatrix
+from utils.downsampling import downsample_frame
+from utils.json_to_model import json_to_model
+from utils.metrics import registry
+
+##### Benchmark end-to-end: lokalny serwer NBP, wbudowana baza, synchronizacja, odczyty, wykresy i obciążenie wielu sesji #####
+
+##### Obliczenia wykresów jak w MainView.render (na pełnych danych, z decymacją serii) #####
+PLOTS = {
+    "Kurs w czasie": lambda matrix, window: matrix.values,
+    "Zmiana dzienna (%)": lambda matrix, window: matrix.pct_change() * 100,
+    "Średnia krocząca (7 dni)": lambda matrix, window: matrix.rolling_mean(window),
+    "Odchylenie (7 dni)": lambda matrix, window: matrix.rolling_std(window, matrix.pct_change()) * 100,
+    "Relacja walut": lambda matrix, window: matrix.ratio(matrix.labels[0], matrix.labels[-1]),
+    "Wskaźnik siły waluty": lambda matrix, window: matrix.strength(),
+    "Korelacja pomiędzy kursami walut": lambda matrix, window: matrix.correlation(),
+}
+
+##### Statystyki serii pomiarów w sekundach #####
+def summarize(timings: list) -> dict:
+    if not timings:
+        return {"count": 0}
+    values = np.asarray(timings)
+    return {
+        "count": len(values),
+        "min": float(values.min()),
+        "p50": float(np.percentile(values, 50)),
+        "p95": float(np.percentile(values, 95)),
+        "max": float(values.max()),
+        "mean": float(values.mean()),
+    }
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+##### Ustawienia aplikacji wskazujące na lokalny serwer i wbudowaną bazę w katalogu tymczasowym #####
+def bench_settings(base_url: str, workdir: str, engine: str, history_start: date) -> dict:
+    settings = copy.deepcopy(init_settings())
+    settings["database"] = {"backend": "embedded", "embedded": {"engine": engine, "path": os.path.join(workdir, f"nbp.{engine}")}}
+    settings["nbp_api"] = dict(settings["nbp_api"], base_url=base_url, rate_limit_per_second=0)
+    settings["api_cache"] = {"enabled": False}
+    settings["sync"] = dict(settings.get("sync", {}), start_date=history_start.isoformat())
+    settings["metrics"] = {"enabled": True}
+    return settings
+
+##### Scenariusz: pełne wczytanie historii do pustej bazy #####
+def cold_backfill(sync_service: SyncService) -> dict:
+    started = time.perf_counter()
+    sync_service.sync_all()
+    elapsed = time.perf_counter() - started
+    tables = sync_service.storage.get_data_version()[1]
+    rows = sum(counter["value"] for counter in registry.snapshot()["counters"] if counter["name"] == "sync.rows_ingested")
+    return {
+        "seconds": elapsed,
+        "tables": tables,
+        "rows": rows,
+        "rows_per_second": rows / elapsed if elapsed else 0.0,
+        "pipeline": sync_service.pipeline_metrics,
+        "http": sync_service.api_service.http_client.get_metrics(),
+    }
+
+##### Kontrola danych: para (code, effectiveDate) unikalna w obrębie typu kursu (inaczej analityka łączy serie różnych tabel) #####
+def check_unique_rates(storage, history_start: date):
+    currencies = storage.get_currencies()
+    for exchange in ("mid", "bid", "ask"):
+        df = storage.get_data_frame(exchange, history_start, date.today(), currencies, ["effectiveDate", "code", exchange])
+        duplicates = df[df.duplicated(["code", "effectiveDate"], keep=False)]
+        if not duplicates.empty:
+            first = duplicates.iloc[0]
+            raise Exception(f"Zduplikowane kursy {exchange}: {len(duplicates)} wierszy (np. {first['code']} z dnia {first['effectiveDate']:%Y-%m-%d}).")
+
+##### Scenariusz: synchronizacja przyrostowa (cofnięcie znaczników o `days` dni, jak po przerwie w pracy) #####
+def incremental_sync(sync_service: SyncService, days: int, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        for table_char in sync_service.tables:
+            watermark = sync_service.storage.get_watermark(table_char)
+            if watermark is not None:
+                sync_service.storage.set_watermark(table_char, watermark - timedelta(days=days))
+        started = time.perf_counter()
+        sync_service.sync_all()
+        timings.append(time.perf_counter() - started)
+    return {"days": days, **summarize(timings)}
+
+##### Scenariusz: opóźnienie zapytań o kursy dla różnych zakresów dat i liczby walut #####
+def read_latency(storage, currencies: list, history_start: date, repeat: int) -> dict:
+    today = date.today()
+    results = {}
+    for range_name, date_from in (("30d", today - timedelta(days=30)), ("1y", today - timedelta(days=365)), ("all", history_start)):
+        for currency_count in sorted({1, min(5, len(currencies)), len(currencies)}):
+            selected = currencies[:currency_count]
+            timings = []
+            rows = 0
+            for _ in range(repeat):
+                started = time.perf_counter()
+                rows = len(storage.get_data_frame("mid", date_from, today, selected, ["effectiveDate", "code", "mid"]))
+                timings.append(time.perf_counter() - started)
+            results[f"{range_name}/{currency_count}"] = {"rows": rows, **summarize(timings)}
+    return results
+
+##### Scenariusz: czas obliczeń każdego wykresu na pełnej historii wszystkich walut #####
+def plot_compute(storage, currencies: list, history_start: date, window: int, max_points: int, repeat: int) -> dict:
+    df = storage.get_data_frame("mid", history_start, date.today(), currencies, ["effectiveDate", "code", "mid"])
+    results = {}
+    for plot_type, compute in PLOTS.items():
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            matrix = RateMatrix.from_frame(df, "mid")
+            result = compute(matrix, window)
+            if isinstance(result, np.ndarray):
+                downsample_frame(df.iloc[matrix.order].assign(value=result), "value", max_points)
+            timings.append(time.perf_counter() - started)
+        results[plot_type] = {"rows": len(df), **summarize(timings)}
+    return results
+
+##### Scenariusz: N równoległych sesji (wspólna pamięć podręczna odczytów jak w aplikacji) #####
+def load_test(storage, currencies: list, history_start: date, sessions: int, requests_per_session: int,
+              window: int, max_points: int, seed: int) -> dict:
+    read_cache = ReadCache(storage)
+    latencies = []
+    lock = threading.Lock()
+    days = (date.today() - history_start).days
+
+    def session(number: int):
+        rnd = random.Random(seed * 7919 + number)
+        for _ in range(requests_per_session):
+            date_from = date.today() - timedelta(days=rnd.choice([30, 90, 365, days]))
+            selected = rnd.sample(currencies, rnd.randint(1, min(5, len(currencies))))
+            plot_type = rnd.choice(list(PLOTS))
+            started = time.perf_counter()
+            df = read_cache.get_data_frame("mid", date_from, date.today(), selected, ["effectiveDate", "code", "mid"])
+            if not df.empty:
+                matrix = RateMatrix.from_frame(df, "mid")
+                result = PLOTS[plot_type](matrix, window)
+                if isinstance(result, np.ndarray):
+                    downsample_frame(df.iloc[matrix.order].assign(value=result), "value", max_points)
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as executor:
+        list(executor.map(session, range(sessions)))
+    elapsed = time.perf_counter() - started
+    return {
+        "sessions": sessions,
+        "requests": len(latencies),
+        "seconds": elapsed,
+        "requests_per_second": len(latencies) / elapsed if elapsed else 0.0,
+        "read_cache": {"hits": read_cache.hits, "misses": read_cache.misses},
+        "latency": summarize(latencies),
+    }
+
+##### Scenariusz: poprawka istniejącego kursu (aktualizacja bez zmiany daty ostatniej tabeli i liczby tabel) #####
+##### Pamięci podręczne odczytów, kursów w pamięci i wykresów muszą po odświeżeniu zwrócić nową wartość #####
+def correction_refresh(storage, history_start: date, currencies: int, seed: int, window: int) -> dict:
+    payload = make_payload("A", history_start + timedelta(days=30), history_start + timedelta(days=37), currencies, seed)
+    table = json_to_model(payload[0])
+    day = table.effectiveDate.date()
+    code = table.rates[0].code
+    date_from, date_to = day - timedelta(days=20), day + timedelta(days=20)
+
+    read_cache = ReadCache(storage, version_check_seconds=0)
+    rate_store = RateStore(storage, ["mid"], version_check_seconds=0)
+    rate_store.load()
+    plot_cache = PlotCache(storage, version_check_seconds=0)
+    loader = lambda exchange, start, end, codes: storage.get_data_frame(exchange, start, end, codes, ["effectiveDate", "code", exchange])
+    readers = {
+        "read_cache": lambda: read_cache.get_data_frame("mid", date_from, date_to, [code], ["effectiveDate", "code", "mid"]),
+        "rate_store": lambda: (rate_store.refresh(), rate_store.query("mid", date_from, date_to, [code]))[1],
+        "plot_cache": lambda: plot_cache.get("mid", date_from, date_to, [code], window, loader),
+    }
+
+    def value_on_day(frame) -> float:
+        return float(frame.loc[frame["effectiveDate"] == np.datetime64(day, "ns"), "mid"].iloc[0])
+
+    before = {name: value_on_day(read()) for name, read in readers.items()}
+    original = table.rates[0].mid
+    corrected = round(original * 1.01, 6)
+    table.rates[0].mid = corrected
+    storage.bulk_upsert_tables([table])
+    timings = {}
+    after = {}
+    for name, read in readers.items():
+        started = time.perf_counter()
+        after[name] = value_on_day(read())
+        timings[name] = time.perf_counter() - started
+    table.rates[0].mid = original
+    storage.bulk_upsert_tables([table])
+
+    stale = [name for name, value in after.items() if not np.isclose(value, corrected)]
+    if stale:
+        raise Exception(f"Pamięci podręczne nie odczytały poprawionego kursu {code} z dnia {day}: {', '.join(stale)}.")
+    return {"code": code, "day": day.isoformat(), "before": before, "after": after, "refresh_seconds": timings}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark end-to-end z lokalnym serwerem NBP i wbudowaną bazą danych.")
+    parser.add_argument("--years", type=int, default=2)
+    parser.add_argument("--currencies", type=int, default=30)
+    parser.add_argument("--engine", choices=["sqlite", "duckdb"], default="sqlite")
+    parser.add_argument("--latency", type=float, default=0.0, help="Opóźnienie odpowiedzi serwera NBP w sekundach.")
+    parser.add_argument("--incremental-days", type=int, default=1)
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--requests-per-session", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Plik wyników JSON (domyślnie benchmarks/results/e2e-<commit>-<czas>.json).")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    logger = logging.getLogger("nbp_bench")
+    history_start = date.today() - timedelta(days=365 * args.years)
+    server = start_stub_server(history_start, currencies=args.currencies, seed=args.seed, latency_seconds=args.latency)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        settings = bench_settings(server.base_url, workdir, args.engine, history_start)
+        window = settings.get("aggregates", {}).get("window", 7)
+        max_points = settings.get("downsampling", {}).get("max_points", 5000)
+        sync_service = SyncService(settings, logger)
+        storage = sync_service.storage
+
+        scenarios = {}
+        print("Scenariusz: pełne wczytanie historii...")
+        scenarios["cold_backfill"] = cold_backfill(sync_service)
+        print("Scenariusz: synchronizacja przyrostowa...")
+        scenarios["incremental_sync"] = incremental_sync(sync_service, args.incremental_days, args.repeat)
+        check_unique_rates(storage, history_start)
+        currencies = storage.get_currencies()
+        print("Scenariusz: opóźnienie odczytów...")
+        scenarios["read_latency"] = read_latency(storage, currencies, history_start, args.repeat)
+        print("Scenariusz: obliczenia wykresów...")
+        scenarios["plot_compute"] = plot_compute(storage, currencies, history_start, window, max_points, args.repeat)
+        print(f"Scenariusz: {args.sessions} równoległych sesji...")
+        scenarios["load_test"] = load_test(storage, currencies, history_start, args.sessions, args.requests_per_session,
+                                           window, max_points, args.seed)
+        print("Scenariusz: poprawka istniejącego kursu...")
+        scenarios["correction_refresh"] = correction_refresh(storage, history_start, args.currencies, args.seed, window)
+    server.shutdown()
+
+    commit = git_commit()
+    results = {
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": vars(args),
+        "stub_requests": server.requests,
+        "scenarios": scenarios,
+        "metrics": registry.snapshot(),
+    }
+    output = args.output or os.path.join("benchmarks", "results", f"e2e-{commit}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+
+    print(f"Pełne wczytanie: {scenarios['cold_backfill']['tables']} tabel, {scenarios['cold_backfill']['rows']} kursów "
+          f"w {scenarios['cold_backfill']['seconds']:.2f} s")
+    print(f"Synchronizacja przyrostowa: p50 {scenarios['incremental_sync']['p50'] * 1000:.1f} ms")
+    print(f"Obciążenie: {scenarios['load_test']['requests_per_second']:.1f} zapytań/s, "
+          f"p95 {scenarios['load_test']['latency']['p95'] * 1000:.1f} ms")
+    print(f"Wyniki zapisano w pliku {output}")
+
+if __name__ == "__main__":
+    main()
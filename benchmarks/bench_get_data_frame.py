@@ -0,0 +1,71 @@
+import argparse
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from benchmarks.synthetic import currency_codes
+from utils.frames import frame_from_chunks
+
+##### Benchmark budowy DataFrame z wyników zapytania: lista krotek vs. paczki fetchmany do typowanych kolumn #####
+
+ALL_COLUMNS = ["table", "no", "effectiveDate", "tradingDate", "currency", "code", "mid", "bid", "ask"]
+
+##### Generuje paczki wierszy w kształcie wyników kursora (jak fetchmany) #####
+def row_chunks(rows: int, currencies: int, columns, chunk_size: int):
+    codes = currency_codes(currencies)
+    start = datetime(2000, 1, 3)
+    days = rows // currencies + 1
+    chunk = []
+    produced = 0
+    for code_index, code in enumerate(codes):
+        for day in range(days):
+            if produced == rows:
+                break
+            effective = start + timedelta(days=day)
+            value = 1.0 + code_index + day * 1e-4
+            row = {
+                "table": "A", "no": f"{day % 256:03d}/A/NBP/{effective.year}", "effectiveDate": effective,
+                "tradingDate": None, "currency": f"waluta {code}", "code": code, "mid": value, "bid": None, "ask": None,
+            }
+            chunk.append(tuple(row[column] for column in columns))
+            produced += 1
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+##### Dotychczasowa ścieżka: fetchall -> lista krotek -> DataFrame #####
+def list_of_tuples(rows: int, currencies: int, chunk_size: int) -> pd.DataFrame:
+    data = [row for chunk in row_chunks(rows, currencies, ALL_COLUMNS, chunk_size) for row in chunk]
+    return pd.DataFrame(data, columns=ALL_COLUMNS)
+
+##### Nowa ścieżka: paczki -> typowane kolumny, tylko kolumny potrzebne wykresowi #####
+def columnar(rows: int, currencies: int, chunk_size: int) -> pd.DataFrame:
+    columns = ["effectiveDate", "code", "mid"]
+    return frame_from_chunks(row_chunks(rows, currencies, columns, chunk_size), columns)
+
+def measure(name, func, *args):
+    tracemalloc.start()
+    started = time.perf_counter()
+    df = func(*args)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    size = df.memory_usage(deep=True).sum()
+    print(f"{name:16s} czas {elapsed:7.2f} s, szczyt pamięci {peak / 2**20:8.1f} MiB, DataFrame {size / 2**20:8.1f} MiB")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark budowy DataFrame z wyników get_data.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--currencies", type=int, default=35)
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    args = parser.parse_args()
+
+    measure("list_of_tuples", list_of_tuples, args.rows, args.currencies, args.chunk_size)
+    measure("columnar", columnar, args.rows, args.currencies, args.chunk_size)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import argparse
+import json
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import List, Optional
+
+from benchmarks.synthetic import make_payload
+from utils.json_to_model import iter_json_array, json_to_models, parse_date
+
+##### Benchmark parsowania odpowiedzi API: dotychczasowy json_to_model (strptime) vs. json_to_models #####
+
+##### Dotychczasowe modele (dataclass bez __slots__) #####
+@dataclass
+class Rates:
+    currency: str
+    code: str
+    mid: Optional[float] = None
+    bid: Optional[float] = None
+    ask: Optional[float] = None
+
+@dataclass
+class Tables:
+    table: str
+    no: str
+    effectiveDate: datetime
+    tradingDate: Optional[datetime] = None
+    rates: List[Rates] = field(default_factory=list)
+
+##### Dotychczasowa konwersja (strptime dla każdej tabeli, argumenty nazwane) #####
+def legacy_json_to_model(data: dict) -> Tables:
+    rates: List[Rates] = []
+    for item in data["rates"]:
+        rates.append(Rates(
+            currency=item.get("currency"),
+            code=item.get("code"),
+            bid=item.get("bid"),
+            ask=item.get("ask"),
+            mid=item.get("mid")
+        ))
+    return Tables(
+        table=data.get("table"),
+        no=data.get("no"),
+        effectiveDate=datetime.strptime(data.get("effectiveDate"), "%Y-%m-%d"),
+        tradingDate=datetime.strptime(data.get("tradingDate"), "%Y-%m-%d") if "tradingDate" in data else None,
+        rates=rates
+    )
+
+def legacy(text: str):
+    return [legacy_json_to_model(data) for data in json.loads(text)]
+
+def fast(text: str):
+    return json_to_models(json.loads(text))
+
+##### Dekodowanie strumieniowe fragmentami po 64 KiB (jak iter_content w HttpClient) #####
+def streamed(text: str, chunk_size: int = 65536):
+    return json_to_models(iter_json_array(text[i:i + chunk_size] for i in range(0, len(text), chunk_size)))
+
+def measure(name, func, text, rates, repeat):
+    timings = []
+    for _ in range(repeat):
+        parse_date.cache_clear()
+        started = time.perf_counter()
+        func(text)
+        timings.append(time.perf_counter() - started)
+    parse_date.cache_clear()
+    tracemalloc.start()
+    result = func(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    best = min(timings)
+    print(f"{name:9s} najlepszy czas {best * 1000:8.1f} ms  {rates / best / 1e6:5.2f} mln kursów/s  "
+          f"szczyt pamięci {peak / 2 ** 20:7.1f} MiB")
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parsowania tabel kursów NBP.")
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--currencies", type=int, default=15)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    end = date(2025, 12, 31)
+    payload = make_payload("C", date(end.year - args.years + 1, 1, 1), end, args.currencies)
+    text = json.dumps(payload)
+    rates = sum(len(table["rates"]) for table in payload)
+    print(f"Tabela C: {len(payload)} tabel, {rates} kursów, {len(text) / 2 ** 20:.1f} MiB JSON")
+
+    before = measure("legacy", legacy, text, rates, args.repeat)
+    after = measure("fast", fast, text, rates, args.repeat)
+    measure("streamed", streamed, text, rates, args.repeat)
+    print(f"Przyspieszenie: {before / after:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import argparse
+import json
+import re
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+from benchmarks.synthetic import make_payload
+
+##### Lokalny odpowiednik api.nbp.pl: syntetyczne tabele A/B/C dla zadanej historii i liczby walut #####
+
+PATH_PATTERN = re.compile(r"^/api/exchangerates/tables/([ABC])/(\d{4}-\d{2}-\d{2})/(\d{4}-\d{2}-\d{2})/?$")
+MAX_RANGE_DAYS = 93
+
+class NbpStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    ##### Serwer z parametrami generowanej historii (od `history_start` do `history_end`) #####
+    def __init__(self, address: Tuple[str, int], history_start: date, history_end: date, currencies: int = 30,
+                 seed: int = 0, latency_seconds: float = 0.0):
+        super().__init__(address, NbpStubHandler)
+        self.history_start = history_start
+        self.history_end = history_end
+        self.currencies = currencies
+        self.seed = seed
+        self.latency_seconds = latency_seconds
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    ##### Adres bazowy zgodny z ustawieniem nbp_api.base_url #####
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/api/exchangerates/tables"
+
+class NbpStubHandler(BaseHTTPRequestHandler):
+    ##### Obsługa GET /api/exchangerates/tables/{tabela}/{od}/{do}/ (kody odpowiedzi jak w API NBP) #####
+    def do_GET(self):
+        server: NbpStubServer = self.server
+        with server.lock:
+            server.requests += 1
+        if server.latency_seconds:
+            time.sleep(server.latency_seconds)
+
+        match = PATH_PATTERN.match(self.path.split("?", 1)[0])
+        if match is None:
+            return self.reply(400, b"400 BadRequest - Nieprawidlowe zapytanie")
+        table_char, start, end = match.group(1), date.fromisoformat(match.group(2)), date.fromisoformat(match.group(3))
+        if end < start or (end - start).days >= MAX_RANGE_DAYS:
+            return self.reply(400, b"400 BadRequest - Przekroczony limit 93 dni")
+
+        start = max(start, server.history_start)
+        end = min(end, server.history_end)
+        payload = make_payload(table_char, start, end, server.currencies, server.seed) if start <= end else []
+        if not payload:
+            return self.reply(404, b"404 NotFound - Brak danych")
+        self.reply(200, json.dumps(payload).encode("utf-8"), "application/json; charset=utf-8")
+
+    def reply(self, status: int, body: bytes, content_type: str = "text/plain; charset=utf-8"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+##### Uruchamia serwer w wątku w tle (port 0 - dowolny wolny port) #####
+def start_stub_server(history_start: date, history_end: date = None, currencies: int = 30, seed: int = 0,
+                      latency_seconds: float = 0.0, host: str = "127.0.0.1", port: int = 0) -> NbpStubServer:
+    server = NbpStubServer((host, port), history_start, history_end or date.today(), currencies, seed, latency_seconds)
+    threading.Thread(target=server.serve_forever, name="nbp-stub-server", daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Lokalny serwer syntetycznych tabel kursów NBP.")
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--currencies", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0, help="Opóźnienie odpowiedzi w sekundach.")
+    parser.add_argument("--port", type=int, default=8093)
+    args = parser.parse_args()
+
+    server = NbpStubServer(("127.0.0.1", args.port), date.today() - timedelta(days=365 * args.years), date.today(),
+                           args.currencies, args.seed, args.latency)
+    print(f"Serwer NBP (syntetyczny) nasłuchuje: {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
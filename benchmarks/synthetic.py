@@ -0,0 +1,77 @@
+import math
+import random
+from datetime import date, timedelta
+from typing import List
+
+##### Generator syntetycznych tabel kursów w formacie JSON API NBP #####
+
+##### Kody walut per typ tabeli jak w API NBP: A - główne, B - egzotyczne (rozłączne z A), C - kupno/sprzedaż #####
+##### Kurs średni danej waluty publikowany jest tylko w jednej tabeli - (code, effectiveDate) unikalne per typ kursu #####
+CURRENCY_CODES = {
+    "A": [
+        "USD", "EUR", "CHF", "GBP", "JPY", "CZK", "DKK", "NOK", "SEK", "HUF",
+        "CAD", "AUD", "NZD", "CNY", "HKD", "SGD", "ZAR", "TRY", "MXN", "BRL",
+        "INR", "ILS", "KRW", "THB", "PHP", "MYR", "IDR", "ISK", "RON", "CLP",
+        "UAH", "XDR", "BGN",
+    ],
+    "B": [
+        "AFN", "MGA", "PAB", "ETB", "VES", "BOB", "CRC", "SVC", "NIO", "GMD",
+        "MKD", "DZD", "BHD", "BIF", "XOF", "XAF", "XPF", "DOP", "VND", "AMD",
+        "ARS", "EGP", "KZT", "MAD", "NGN", "PEN", "AED", "SAR", "QAR", "KWD",
+        "OMR", "JOD", "LKR", "PKR", "BDT", "NPR", "KES", "TZS", "UGX", "GEL",
+    ],
+    "C": ["USD", "AUD", "CAD", "EUR", "HUF", "CHF", "GBP", "JPY", "CZK", "DKK", "NOK", "SEK", "XDR"],
+}
+
+##### Prefiks kodów uzupełniających (gdy brakuje kodów danej tabeli; rozłączne pomiędzy tabelami) #####
+FILLER_PREFIXES = {"A": "Q", "B": "W", "C": "Z"}
+
+##### Zwraca listę kodów walut danej tabeli o zadanej liczności #####
+def currency_codes(count: int, table_char: str = "A") -> List[str]:
+    codes = CURRENCY_CODES[table_char][:count]
+    for i in range(len(codes), count):
+        codes.append(f"{FILLER_PREFIXES[table_char]}{i:02d}"[:3])
+    return codes
+
+##### Zwraca dni, w których publikowana jest dana tabela (A, C - dni robocze, B - środy) #####
+def publication_days(table_char: str, start: date, end: date) -> List[date]:
+    days = []
+    day = start
+    while day <= end:
+        if table_char == "B":
+            if day.weekday() == 2:
+                days.append(day)
+        elif day.weekday() < 5:
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+##### Generuje tabele kursów (lista słowników JSON) dla zakresu dat #####
+def make_payload(table_char: str, start: date, end: date, currencies: int = 30, seed: int = 0) -> List[dict]:
+    codes = currency_codes(currencies, table_char)
+    payload = []
+    for day in publication_days(table_char, start, end):
+        ordinal = day.toordinal()
+        rnd = random.Random(seed * 1_000_003 + ordinal * 31 + ord(table_char))
+        rates = []
+        for i, code in enumerate(codes):
+            base = 1.0 + (i % 7) + 0.25 * math.sin(ordinal / (60.0 + i))
+            mid = round(base * (1.0 + rnd.uniform(-0.003, 0.003)), 6)
+            rate = {"currency": f"waluta {code}", "code": code}
+            if table_char == "C":
+                rate["bid"] = round(mid * 0.99, 6)
+                rate["ask"] = round(mid * 1.01, 6)
+            else:
+                rate["mid"] = mid
+            rates.append(rate)
+
+        table = {
+            "table": table_char,
+            "no": f"{day.timetuple().tm_yday:03d}/{table_char}/NBP/{day.year}",
+            "effectiveDate": day.isoformat(),
+        }
+        if table_char == "C":
+            table["tradingDate"] = (day - timedelta(days=1)).isoformat()
+        table["rates"] = rates
+        payload.append(table)
+    return payload
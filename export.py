@@ -0,0 +1,41 @@
+import argparse
+from datetime import date
+
+from config.init_settings import init_settings
+from services.storage_factory import create_storage
+from services.storage_service import DATA_COLUMN_NAMES
+from utils.export import EXPORT_FORMATS, export_chunks, export_extension
+from utils.logger import init_logger
+from utils.metrics import registry
+
+def main():
+    logger = init_logger()
+    settings = init_settings()
+    registry.configure(settings)
+    export_settings = settings.get("export", {})
+
+    parser = argparse.ArgumentParser(description="Eksport kursów walut NBP z bazy danych do pliku CSV lub Parquet.")
+    parser.add_argument("--exchange", default="mid", help="Typ kursu (mid, bid, ask).")
+    parser.add_argument("--date-from", type=date.fromisoformat, default=date(1900, 1, 1), help="Data początkowa (RRRR-MM-DD).")
+    parser.add_argument("--date-to", type=date.fromisoformat, default=date.today(), help="Data końcowa (RRRR-MM-DD).")
+    parser.add_argument("--currencies", nargs="*", help="Kody walut (domyślnie wszystkie).")
+    parser.add_argument("--columns", nargs="*", default=DATA_COLUMN_NAMES, help="Eksportowane kolumny.")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default=export_settings.get("format", "csv"))
+    parser.add_argument("--no-compress", action="store_true", help="CSV bez kompresji gzip.")
+    parser.add_argument("--chunk-size", type=int, default=export_settings.get("chunk_size", 50000),
+                        help="Liczba wierszy w paczce (grupie wierszy Parquet).")
+    parser.add_argument("--output", help="Ścieżka pliku wynikowego.")
+    args = parser.parse_args()
+
+    storage = create_storage(settings)
+    currencies = args.currencies or storage.get_currencies()
+    output = args.output or f"nbp_{args.exchange}_{args.date_from}_{args.date_to}{export_extension(args.format, not args.no_compress)}"
+
+    logger.info(f"Rozpoczęcie eksportu kursów {args.exchange} (od {args.date_from} do {args.date_to}) do pliku {output}.")
+    chunks = storage.iter_data_chunks(args.exchange, args.date_from, args.date_to, currencies, args.columns, args.chunk_size)
+    rows = export_chunks(chunks, output, args.columns, args.format, not args.no_compress)
+    logger.info(f"Zakończenie eksportu: zapisano {rows} rekordów do pliku {output}.")
+    registry.write()
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,8 @@ CREATE TABLE [NBP].[Tables](
 	[table] VARCHAR(1) NOT NULL,
 	[no] VARCHAR(20) NOT NULL,
 	[effectiveDate] DATETIME2 NOT NULL,
-	[tradingDate] DATETIME2 NULL
+	[tradingDate] DATETIME2 NULL,
+	CONSTRAINT [UQ_Tables_table_no] UNIQUE ([table], [no])
 )
 
 CREATE TABLE [NBP].[Rates](
@@ -19,5 +20,36 @@ CREATE TABLE [NBP].[Rates](
 	FOREIGN KEY ([tableId]) REFERENCES [NBP].[Tables]([Id])
 )
 
+CREATE UNIQUE INDEX [UQ_Rates_tableId_code] ON [NBP].[Rates] ([tableId], [code]) INCLUDE ([currency], [mid], [bid], [ask])
+CREATE INDEX [IX_Rates_code] ON [NBP].[Rates] ([code]) INCLUDE ([tableId], [currency], [mid], [bid], [ask])
+CREATE INDEX [IX_Tables_effectiveDate] ON [NBP].[Tables] ([effectiveDate]) INCLUDE ([table], [no], [tradingDate])
+CREATE INDEX [IX_Tables_table_effectiveDate] ON [NBP].[Tables] ([table], [effectiveDate])
+
+CREATE TABLE [NBP].[DailyStats](
+	[code] VARCHAR(3) NOT NULL,
+	[exchangeType] VARCHAR(3) NOT NULL,
+	[effectiveDate] DATETIME2 NOT NULL,
+	[value] FLOAT NOT NULL,
+	[changePct] FLOAT NULL,
+	[rollingMean] FLOAT NULL,
+	[rollingStd] FLOAT NULL,
+	PRIMARY KEY ([exchangeType], [code], [effectiveDate])
+)
+
+CREATE TABLE [NBP].[SyncState](
+	[table] VARCHAR(1) PRIMARY KEY,
+	[lastDate] DATE NOT NULL,
+	[updatedAt] DATETIME2 NOT NULL
+)
+
+CREATE TABLE [NBP].[Changes](
+	[generation] BIGINT PRIMARY KEY IDENTITY(1,1),
+	[dateFrom] DATE NOT NULL,
+	[changedAt] DATETIME2 NOT NULL DEFAULT SYSDATETIME()
+)
+
 GRANT SELECT, INSERT, UPDATE, DELETE ON [NBP].[Tables] TO PUBLIC
-GRANT SELECT, INSERT, UPDATE, DELETE ON [NBP].[Rates] TO PUBLIC
\ No newline at end of file
+GRANT SELECT, INSERT, UPDATE, DELETE ON [NBP].[Rates] TO PUBLIC
+GRANT SELECT, INSERT, UPDATE, DELETE ON [NBP].[DailyStats] TO PUBLIC
+GRANT SELECT, INSERT, UPDATE, DELETE ON [NBP].[SyncState] TO PUBLIC
+GRANT SELECT, INSERT, UPDATE, DELETE ON [NBP].[Changes] TO PUBLIC
\ No newline at end of file
@@ -0,0 +1,10 @@
+-- Aktualizacja istniejącej bazy: dziennik zmian danych (numer zmiany i najwcześniejsza zmieniona data notowania)
+-- Wersja danych obejmuje numer ostatniej zmiany - pamięci podręczne aplikacji wykrywają również poprawki istniejących kursów
+
+CREATE TABLE [NBP].[Changes](
+	[generation] BIGINT PRIMARY KEY IDENTITY(1,1),
+	[dateFrom] DATE NOT NULL,
+	[changedAt] DATETIME2 NOT NULL DEFAULT SYSDATETIME()
+)
+
+GRANT SELECT, INSERT, UPDATE, DELETE ON [NBP].[Changes] TO PUBLIC
\ No newline at end of file
@@ -0,0 +1,14 @@
+-- Aktualizacja istniejącej bazy: tabela zagregowanych statystyk dziennych (wypełniana przez: python sync.py --rebuild-aggregates)
+
+CREATE TABLE [NBP].[DailyStats](
+	[code] VARCHAR(3) NOT NULL,
+	[exchangeType] VARCHAR(3) NOT NULL,
+	[effectiveDate] DATETIME2 NOT NULL,
+	[value] FLOAT NOT NULL,
+	[changePct] FLOAT NULL,
+	[rollingMean] FLOAT NULL,
+	[rollingStd] FLOAT NULL,
+	PRIMARY KEY ([exchangeType], [code], [effectiveDate])
+)
+
+GRANT SELECT, INSERT, UPDATE, DELETE ON [NBP].[DailyStats] TO PUBLIC
\ No newline at end of file
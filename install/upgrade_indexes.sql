@@ -0,0 +1,40 @@
+-- Aktualizacja istniejącej bazy: usunięcie duplikatów oraz założenie ograniczeń unikalności i indeksów
+
+-- Duplikaty kursów w ramach jednej tabeli (pozostaje rekord o najniższym id)
+;WITH [duplicates] AS (
+	SELECT [id], ROW_NUMBER() OVER (PARTITION BY [tableId], [code] ORDER BY [id]) AS [rn]
+	FROM [NBP].[Rates]
+)
+DELETE FROM [duplicates] WHERE [rn] > 1
+
+-- Duplikaty tabel (kursy przepinane do tabeli o najniższym id)
+;WITH [tables] AS (
+	SELECT [id], MIN([id]) OVER (PARTITION BY [table], [no]) AS [keepId]
+	FROM [NBP].[Tables]
+)
+DELETE r FROM [NBP].[Rates] r
+JOIN [tables] t ON r.[tableId] = t.[id]
+WHERE t.[id] <> t.[keepId]
+AND EXISTS (SELECT 1 FROM [NBP].[Rates] k WHERE k.[tableId] = t.[keepId] AND k.[code] = r.[code])
+
+;WITH [tables] AS (
+	SELECT [id], MIN([id]) OVER (PARTITION BY [table], [no]) AS [keepId]
+	FROM [NBP].[Tables]
+)
+UPDATE r SET r.[tableId] = t.[keepId]
+FROM [NBP].[Rates] r
+JOIN [tables] t ON r.[tableId] = t.[id]
+WHERE t.[id] <> t.[keepId]
+
+;WITH [duplicates] AS (
+	SELECT [id], ROW_NUMBER() OVER (PARTITION BY [table], [no] ORDER BY [id]) AS [rn]
+	FROM [NBP].[Tables]
+)
+DELETE FROM [duplicates] WHERE [rn] > 1
+
+ALTER TABLE [NBP].[Tables] ADD CONSTRAINT [UQ_Tables_table_no] UNIQUE ([table], [no])
+
+CREATE UNIQUE INDEX [UQ_Rates_tableId_code] ON [NBP].[Rates] ([tableId], [code]) INCLUDE ([currency], [mid], [bid], [ask])
+CREATE INDEX [IX_Rates_code] ON [NBP].[Rates] ([code]) INCLUDE ([tableId], [currency], [mid], [bid], [ask])
+CREATE INDEX [IX_Tables_effectiveDate] ON [NBP].[Tables] ([effectiveDate]) INCLUDE ([table], [no], [tradingDate])
+CREATE INDEX [IX_Tables_table_effectiveDate] ON [NBP].[Tables] ([table], [effectiveDate])
\ No newline at end of file
@@ -1,8 +1,18 @@
 from config.init_settings import init_settings
 import streamlit as st
+from services.sync_service import SyncService
 from utils.logger import init_logger
+from utils.metrics import registry
 from views.main_view import MainView
 
+##### Uruchomienie synchronizacji w tle - jeden wątek na proces serwera #####
+@st.cache_resource
+def start_sync_scheduler(_settings: dict, _logger):
+    sync_settings = _settings.get("sync", {})
+    if not sync_settings.get("run_in_app", False):
+        return None
+    return SyncService(_settings, _logger).start_background(sync_settings.get("interval_seconds", 900))
+
 def main():
     logger = init_logger()
     logger.info("Rozpoczęcie działania aplikacji.")
@@ -10,11 +20,19 @@ def main():
 
     try:
         settings = init_settings()
+        registry.configure(settings)
     except Exception as ex:
         logger.exception(f"Błąd podczas inicjalizacji ustawień aplikacji: {ex}")
 
-    menu_view = MainView(settings, logger)
-    menu_view.render()
+    try:
+        start_sync_scheduler(settings, logger)
+    except Exception as ex:
+        logger.exception(f"Błąd podczas uruchamiania synchronizacji w tle: {ex}")
+
+    with registry.profiled("render"), registry.timed("render.total"):
+        menu_view = MainView(settings, logger)
+        menu_view.render()
+    registry.maybe_write()
     logger.info("Zakończenie działania aplikacji.")
 
 if __name__ == "__main__":
@@ -3,7 +3,7 @@ from datetime import datetime
 from models.rates import Rates
 from typing import Optional, List
 
-@dataclass
+@dataclass(slots=True)
 class Tables:
     table: str
     no: str
@@ -0,0 +1,57 @@
+from datetime import date, datetime
+from logging import Logger
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from services.storage_service import StorageService
+from utils.analytics import RateMatrix
+
+##### Statystyki dzienne są utrzymywane tylko bez pamięci podręcznej wykresów (ta wylicza te same statystyki w pamięci) #####
+def aggregates_enabled(settings: dict) -> bool:
+    return settings.get("aggregates", {}).get("enabled", False) and not settings.get("plot_cache", {}).get("enabled", False)
+
+class AggregateService:
+    ##### Konstruktor serwisu utrzymującego statystyki dzienne (NBP.DailyStats) #####
+    def __init__(self, storage: StorageService, logger: Logger, exchanges: List[str], window: int = 7):
+        self.storage = storage
+        self.logger = logger
+        self.exchanges = exchanges
+        self.window = window
+
+    ##### Typy kursów publikowane w danej tabeli (A, B - kurs średni, C - kupno/sprzedaż) #####
+    @staticmethod
+    def exchanges_for_table(table_char: str) -> List[str]:
+        return ["bid", "ask"] if table_char == "C" else ["mid"]
+
+    ##### Wylicza statystyki z kursów posortowanych po (code, effectiveDate) #####
+    def compute(self, source: pd.DataFrame) -> pd.DataFrame:
+        matrix = RateMatrix.from_frame(source, "value")
+        change = matrix.pct_change()
+        return pd.DataFrame({
+            "effectiveDate": matrix.dates,
+            "code": matrix.labels[matrix.group],
+            "value": matrix.values,
+            "changePct": change * 100,
+            "rollingMean": matrix.rolling_mean(self.window),
+            "rollingStd": matrix.rolling_std(self.window, change) * 100,
+        })
+
+    ##### Przelicza statystyki od daty `since` (None - cała historia), korzystając tylko z okna poprzedzającego #####
+    def refresh(self, since: Optional[date] = None, exchanges: List[str] = None) -> int:
+        if isinstance(since, datetime):
+            since = since.date()
+        written = 0
+        for exchange_type in exchanges or self.exchanges:
+            # Odchylenie zmian dziennych wymaga `window` + 1 wcześniejszych notowań
+            source = self.storage.get_stats_source(exchange_type, since, self.window + 1)
+            if source.empty:
+                continue
+            stats = self.compute(source)
+            if since is not None:
+                stats = stats[stats["effectiveDate"].to_numpy() >= np.datetime64(since, "ns")]
+            written += self.storage.upsert_daily_stats(exchange_type, stats)
+        if written:
+            self.logger.info(f"Zaktualizowano {written} statystyk dziennych (od {since or 'początku historii'}).")
+        return written
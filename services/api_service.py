@@ -1,22 +1,117 @@
-import requests
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import Dict, List, Tuple, Union
 
-from utils.json_to_model import json_to_model
+from models.tables import Tables
+from services.cache_service import ResponseCache
+from services.http_client import HttpClient
+from utils.json_to_model import json_to_models
+from utils.metrics import timed
 
 class ApiService:
     ##### Konstruktor inicjalizujący połączenie z bazą danych #####
-    def __init__(self, url: str):
+    def __init__(self, url: str, max_workers: int = 4, http_client: HttpClient = None,
+                 cache: ResponseCache = None, offline: bool = False):
         self.url = url
+        self.max_workers = max_workers
+        self.http_client = http_client or HttpClient()
+        self.cache = cache
+        self.offline = offline
+
+    ##### Tworzy serwis na podstawie ustawień aplikacji (sekcje "nbp_api" i "api_cache") #####
+    @classmethod
+    def from_settings(cls, settings: dict, offline: bool = None) -> "ApiService":
+        api_settings = settings["nbp_api"]
+        cache_settings = settings.get("api_cache", {})
+        cache = None
+        if cache_settings.get("enabled", False):
+            cache = ResponseCache(cache_settings.get("path", "cache/nbp_responses.sqlite"), cache_settings.get("ttl_seconds", 900))
+        if offline is None:
+            offline = cache_settings.get("offline", False)
+        return cls(api_settings["base_url"], api_settings.get("max_workers", 4), HttpClient.from_settings(api_settings), cache, offline)
+
+    ##### Pierwszy i ostatni dzień kwartału kalendarzowego zawierającego dany dzień #####
+    @staticmethod
+    def quarter_bounds(day: date) -> Tuple[date, date]:
+        quarter_month = (day.month - 1) // 3 * 3 + 1
+        next_quarter = date(day.year + (quarter_month + 3 > 12), (quarter_month + 2) % 12 + 1, 1)
+        return date(day.year, quarter_month, 1), next_quarter - timedelta(days=1)
+
+    ##### Podział zakresu dat na okna kwartalne (API NBP przyjmuje zakres do 93 dni) #####
+    @staticmethod
+    def split_range(startDate: Union[str, date], endDate: Union[str, date]) -> List[Tuple[date, date]]:
+        start = date.fromisoformat(startDate) if isinstance(startDate, str) else startDate
+        end = date.fromisoformat(endDate) if isinstance(endDate, str) else endDate
+        windows = []
+        while start <= end:
+            quarter_end = ApiService.quarter_bounds(start)[1]
+            windows.append((start, min(end, quarter_end)))
+            start = quarter_end + timedelta(days=1)
+        return windows
 
     ### Pobieranie listy kursów z API NBP (url, nazwa tabeli (A,B,C), data początkowa, data końcowa) ###
+    @timed("api.get_tables")
     def get_tables(self, table_letter: str, startDate: str, endDate: str) -> dict:
-        url = f"{self.url}/{table_letter}/{startDate}/{endDate}?format=json"
-        response = requests.get(url)
-        if response.status_code == 404:
-            return []
-        if response.status_code != 200:
-            raise Exception(f"Błąd {response.status_code}: {response.text}")
-        return response.json()
+        if self.cache is None:
+            if self.offline:
+                raise Exception(f"Brak tabeli {table_letter} ({startDate} - {endDate}) w pamięci podręcznej - tryb offline.")
+            return self.http_client.get_json(f"{self.url}/{table_letter}/{startDate}/{endDate}?format=json")
+
+        # Pamięć podręczna przechowuje pełne kwartały - klucze nie zależą od znacznika synchronizacji
+        payload = []
+        for window_start, window_end in self.split_range(startDate, endDate):
+            quarter = self.get_quarter(table_letter, *self.quarter_bounds(window_start))
+            payload.extend(table for table in quarter
+                           if window_start.isoformat() <= table["effectiveDate"] <= window_end.isoformat())
+        return payload
+
+    ### Pobieranie tabel z całego kwartału (z pamięci podręcznej lub API NBP - do dnia dzisiejszego) ###
+    def get_quarter(self, table_letter: str, quarter_start: date, quarter_end: date) -> list:
+        payload = self.cache.get(table_letter, quarter_start.isoformat(), quarter_end.isoformat(), ignore_ttl=self.offline)
+        if payload is not None:
+            return payload
+        if self.offline:
+            raise Exception(f"Brak tabeli {table_letter} ({quarter_start} - {quarter_end}) w pamięci podręcznej - tryb offline.")
+
+        url = f"{self.url}/{table_letter}/{quarter_start.isoformat()}/{min(quarter_end, date.today()).isoformat()}?format=json"
+        payload = self.http_client.get_json(url)
+        self.cache.put(table_letter, quarter_start.isoformat(), quarter_end.isoformat(), payload)
+        return payload
 
     ### Pobieranie listy kursów z API NBP i konwersja do modelu danych ###
-    def get_table_models(self, table_letter: str, startDate: str, endDate: str):
-        return [json_to_model(data) for data in self.get_tables(table_letter, startDate, endDate)]
\ No newline at end of file
+    def get_table_models(self, table_letter: str, startDate: str, endDate: str) -> List[Tables]:
+        return self.get_table_models_many({table_letter: (startDate, endDate)})[table_letter]
+
+    ### Równoległe pobieranie wielu typów tabel w oknach 93-dniowych (wyniki w kolejności dat) ###
+    ### Błąd okna przerywa wyniki tylko danego typu tabeli: trafia do `errors` (lub jest zgłaszany, gdy `errors` nie podano) ###
+    def get_table_models_many(self, ranges: Dict[str, Tuple[str, str]],
+                              errors: Dict[str, Exception] = None) -> Dict[str, List[Tables]]:
+        jobs = [(table_letter, window) for table_letter, (startDate, endDate) in ranges.items()
+                for window in self.split_range(startDate, endDate)]
+        results = {table_letter: [] for table_letter in ranges}
+        if not jobs:
+            return results
+
+        def fetch(job: Tuple[str, Tuple[date, date]]):
+            table_letter, (startDate, endDate) = job
+            try:
+                return json_to_models(self.get_tables(table_letter, startDate.isoformat(), endDate.isoformat())), None
+            except Exception as ex:
+                return None, ex
+
+        failures: Dict[str, Exception] = {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(jobs))) as executor:
+            for (table_letter, _), (models, ex) in zip(jobs, executor.map(fetch, jobs)):
+                # Po pierwszym błędzie kolejne okna danego typu są pomijane - wyniki pozostają ciągłe od daty początkowej
+                if table_letter in failures:
+                    continue
+                if ex is not None:
+                    failures[table_letter] = ex
+                    continue
+                results[table_letter].extend(models)
+
+        if errors is None and failures:
+            raise next(iter(failures.values()))
+        if errors is not None:
+            errors.update(failures)
+        return results
@@ -0,0 +1,60 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import date, datetime
+from typing import Optional
+
+from utils.metrics import increment
+
+class ResponseCache:
+    ##### Konstruktor trwałej pamięci podręcznej odpowiedzi API NBP (SQLite, skompresowany JSON) #####
+    def __init__(self, path: str, ttl_seconds: int = 900):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS responses(
+                                 [table] TEXT NOT NULL,
+                                 [startDate] TEXT NOT NULL,
+                                 [endDate] TEXT NOT NULL,
+                                 [payload] BLOB NOT NULL,
+                                 [fetchedAt] REAL NOT NULL,
+                                 PRIMARY KEY ([table], [startDate], [endDate]))""")
+        self.conn.commit()
+
+    ##### Okno jest zamknięte dopiero, gdy zostało pobrane po swoim ostatnim dniu - wcześniej mogą dojść tabele (wygasa po czasie TTL) #####
+    @staticmethod
+    def is_closed(endDate: str, fetchedAt: float) -> bool:
+        return datetime.fromtimestamp(fetchedAt).date() > date.fromisoformat(endDate)
+
+    ##### Metoda zwracająca odpowiedź z pamięci podręcznej (None, gdy brak lub wygasła); klucz - pełny kwartał kalendarzowy #####
+    def get(self, table_letter: str, startDate: str, endDate: str, ignore_ttl: bool = False) -> Optional[list]:
+        with self.lock:
+            row = self.conn.execute("""SELECT [payload], [fetchedAt]
+                                       FROM responses
+                                       WHERE [table] = ? AND [startDate] = ? AND [endDate] = ?""",
+                                    (table_letter, startDate, endDate)).fetchone()
+            expired = row is not None and not ignore_ttl and not self.is_closed(endDate, row[1]) \
+                and time.time() - row[1] > self.ttl_seconds
+            if row is None or expired:
+                self.misses += 1
+                increment("api_cache.misses")
+                return None
+            self.hits += 1
+        increment("api_cache.hits")
+        return json.loads(zlib.decompress(row[0]))
+
+    ##### Metoda zapisująca odpowiedź w pamięci podręcznej #####
+    def put(self, table_letter: str, startDate: str, endDate: str, payload: list):
+        blob = zlib.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"), 6)
+        with self.lock:
+            self.conn.execute("""INSERT OR REPLACE INTO responses ([table], [startDate], [endDate], [payload], [fetchedAt])
+                                 VALUES (?, ?, ?, ?, ?)""",
+                              (table_letter, startDate, endDate, blob, time.time()))
+            self.conn.commit()
@@ -0,0 +1,100 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+import pyodbc
+
+class ConnectionPool:
+    ##### Konstruktor puli połączeń z bazą danych (ograniczony rozmiar, kontrola stanu połączeń) #####
+    def __init__(self, connection_string: str, max_size: int = 5, health_check_seconds: int = 30, timeout: int = 30):
+        self.connection_string = connection_string
+        self.max_size = max_size
+        self.health_check_seconds = health_check_seconds
+        self.timeout = timeout
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(max_size)
+
+    ##### Metoda pobierająca połączenie z puli (nowe, gdy brak wolnych i nie osiągnięto limitu) #####
+    def acquire(self) -> pyodbc.Connection:
+        if not self.slots.acquire(timeout=self.timeout):
+            raise Exception(f"Brak wolnego połączenia w puli (limit {self.max_size}) po {self.timeout} s.")
+        try:
+            while True:
+                try:
+                    conn, last_used = self.idle.get_nowait()
+                except queue.Empty:
+                    return pyodbc.connect(self.connection_string)
+                if time.monotonic() - last_used < self.health_check_seconds or self._is_alive(conn):
+                    return conn
+                self._close(conn)
+        except Exception:
+            self.slots.release()
+            raise
+
+    ##### Metoda zwracająca połączenie do puli (uszkodzone połączenie jest zamykane) #####
+    def release(self, conn: pyodbc.Connection, broken: bool = False):
+        try:
+            if not broken:
+                try:
+                    conn.rollback()
+                except pyodbc.Error:
+                    broken = True
+            if broken:
+                self._close(conn)
+            else:
+                self.idle.put((conn, time.monotonic()))
+        finally:
+            self.slots.release()
+
+    ##### Menedżer kontekstu: with pool.connection() as conn #####
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        broken = False
+        try:
+            yield conn
+        except pyodbc.OperationalError:
+            broken = True
+            raise
+        finally:
+            self.release(conn, broken)
+
+    ##### Metoda zamykająca wszystkie wolne połączenia #####
+    def close_all(self):
+        while True:
+            try:
+                conn, _ = self.idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(conn)
+
+    @staticmethod
+    def _is_alive(conn: pyodbc.Connection) -> bool:
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            cursor.close()
+            return True
+        except pyodbc.Error:
+            return False
+
+    @staticmethod
+    def _close(conn: pyodbc.Connection):
+        try:
+            conn.close()
+        except pyodbc.Error:
+            pass
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+##### Zwraca współdzieloną w procesie pulę połączeń dla danego connection stringa #####
+def get_pool(connection_string: str, max_size: int = 5, health_check_seconds: int = 30) -> ConnectionPool:
+    with _pools_lock:
+        pool = _pools.get(connection_string)
+        if pool is None:
+            pool = ConnectionPool(connection_string, max_size, health_check_seconds)
+            _pools[connection_string] = pool
+        return pool
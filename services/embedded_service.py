@@ -0,0 +1,432 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+from models.rates import Rates
+from models.tables import Tables
+from services.storage_service import DATA_COLUMN_NAMES, EXCHANGE_TYPES, STATS_COLUMNS, StorageService
+from utils.frames import cast_frame, frame_from_chunks
+from utils.metrics import instrument_methods
+
+##### Wyrażenia SQL kolumn zwracanych przez get_data / get_data_frame #####
+DATA_COLUMNS = {
+    "table": 't."table"',
+    "no": 't."no"',
+    "effectiveDate": 't."effectiveDate"',
+    "tradingDate": 't."tradingDate"',
+    "currency": 'r."currency"',
+    "code": 'r."code"',
+    "mid": 'r."mid"',
+    "bid": 'r."bid"',
+    "ask": 'r."ask"',
+}
+
+##### Schemat bazy wbudowanej (odpowiednik install/install.sql) #####
+SCHEMA = {
+    "sqlite": [
+        '''CREATE TABLE IF NOT EXISTS nbp_tables(
+               "id" INTEGER PRIMARY KEY,
+               "table" TEXT NOT NULL,
+               "no" TEXT NOT NULL,
+               "effectiveDate" DATE NOT NULL,
+               "tradingDate" DATE NULL,
+               UNIQUE ("table", "no"))''',
+        '''CREATE TABLE IF NOT EXISTS nbp_rates(
+               "id" INTEGER PRIMARY KEY,
+               "tableId" INTEGER NOT NULL REFERENCES nbp_tables("id"),
+               "currency" TEXT NOT NULL,
+               "code" TEXT NOT NULL,
+               "mid" DOUBLE NULL,
+               "bid" DOUBLE NULL,
+               "ask" DOUBLE NULL,
+               UNIQUE ("tableId", "code"))''',
+        'CREATE INDEX IF NOT EXISTS ix_tables_effective_date ON nbp_tables("effectiveDate")',
+        'CREATE INDEX IF NOT EXISTS ix_tables_table_effective_date ON nbp_tables("table", "effectiveDate")',
+        'CREATE INDEX IF NOT EXISTS ix_rates_code ON nbp_rates("code")',
+        '''CREATE TABLE IF NOT EXISTS nbp_changes(
+               "generation" INTEGER PRIMARY KEY,
+               "dateFrom" DATE NOT NULL,
+               "changedAt" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)''',
+    ],
+    "duckdb": [
+        'CREATE SEQUENCE IF NOT EXISTS nbp_tables_id',
+        'CREATE SEQUENCE IF NOT EXISTS nbp_rates_id',
+        'CREATE SEQUENCE IF NOT EXISTS nbp_changes_id',
+        '''CREATE TABLE IF NOT EXISTS nbp_tables(
+               "id" INTEGER PRIMARY KEY DEFAULT nextval('nbp_tables_id'),
+               "table" VARCHAR NOT NULL,
+               "no" VARCHAR NOT NULL,
+               "effectiveDate" DATE NOT NULL,
+               "tradingDate" DATE NULL,
+               UNIQUE ("table", "no"))''',
+        '''CREATE TABLE IF NOT EXISTS nbp_rates(
+               "id" INTEGER PRIMARY KEY DEFAULT nextval('nbp_rates_id'),
+               "tableId" INTEGER NOT NULL,
+               "currency" VARCHAR NOT NULL,
+               "code" VARCHAR NOT NULL,
+               "mid" DOUBLE NULL,
+               "bid" DOUBLE NULL,
+               "ask" DOUBLE NULL,
+               UNIQUE ("tableId", "code"))''',
+        '''CREATE TABLE IF NOT EXISTS nbp_changes(
+               "generation" BIGINT PRIMARY KEY DEFAULT nextval('nbp_changes_id'),
+               "dateFrom" DATE NOT NULL,
+               "changedAt" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)''',
+    ],
+    "common": [
+        '''CREATE TABLE IF NOT EXISTS nbp_daily_stats(
+               "exchangeType" VARCHAR NOT NULL,
+               "code" VARCHAR NOT NULL,
+               "effectiveDate" DATE NOT NULL,
+               "value" DOUBLE NOT NULL,
+               "changePct" DOUBLE NULL,
+               "rollingMean" DOUBLE NULL,
+               "rollingStd" DOUBLE NULL,
+               PRIMARY KEY ("exchangeType", "code", "effectiveDate"))''',
+        '''CREATE TABLE IF NOT EXISTS nbp_sync_state(
+               "table" VARCHAR PRIMARY KEY,
+               "lastDate" DATE NOT NULL,
+               "updatedAt" TIMESTAMP NOT NULL)''',
+    ],
+}
+
+@instrument_methods("storage", StorageService.__abstractmethods__, backend="embedded")
+class EmbeddedService(StorageService):
+    ##### Konstruktor wbudowanego magazynu danych (SQLite - bez zależności, DuckDB - kolumnowy) #####
+    def __init__(self, path: str, engine: str = "sqlite"):
+        self.path = path
+        self.engine = engine
+        self.lock = threading.RLock()
+        self.sync_lock = threading.Lock()
+        self.lock_path = None if path == ":memory:" else f"{path}.sync.lock"
+        self.lock_fd = None
+        self.read_only = False
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        if engine == "duckdb":
+            try:
+                import duckdb
+            except ImportError as ex:
+                raise Exception("Magazyn 'duckdb' wymaga pakietu duckdb (pip install duckdb).") from ex
+            try:
+                self.conn = duckdb.connect(path)
+            except duckdb.IOException:
+                # DuckDB dopuszcza jeden proces z zapisem na plik - gdy plik należy do innego procesu (np. sync.py),
+                # magazyn działa tylko do odczytu i nie podejmuje synchronizacji
+                self.conn = duckdb.connect(path, read_only=True)
+                self.read_only = True
+        elif engine == "sqlite":
+            self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+            if path != ":memory:":
+                # Tryb WAL - odczyty aplikacji nie są blokowane zapisem synchronizacji w innym procesie
+                self.conn.execute("PRAGMA journal_mode=WAL")
+        else:
+            raise ValueError(f"Nieznany silnik bazy wbudowanej: {engine}")
+
+        if not self.read_only:
+            with self.lock:
+                for statement in SCHEMA[engine] + SCHEMA["common"]:
+                    self.conn.execute(statement)
+
+    ##### Tworzy magazyn na podstawie sekcji "database.embedded" z appsettings.json #####
+    @classmethod
+    def from_settings(cls, settings: dict) -> "EmbeddedService":
+        embedded = settings["database"].get("embedded", {})
+        return cls(embedded.get("path", "data/nbp.sqlite"), embedded.get("engine", "sqlite"))
+
+    ##### Transakcja (jawne BEGIN/COMMIT - oba silniki działają w trybie autocommit) #####
+    @contextmanager
+    def transaction(self):
+        with self.lock:
+            self.conn.execute("BEGIN TRANSACTION")
+            try:
+                yield self.conn
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    ##### Zapytanie zwracające wszystkie wiersze (pod blokadą połączenia) #####
+    def query(self, sql: str, params: list = None) -> list:
+        with self.lock:
+            return self.conn.execute(sql, params or []).fetchall()
+
+    ##### Konwersja daty na parametr zapytania (SQLite przechowuje daty jako tekst ISO) #####
+    def to_param(self, value):
+        if isinstance(value, datetime):
+            value = value.date()
+        if isinstance(value, date) and self.engine == "sqlite":
+            return value.isoformat()
+        return value
+
+    ##### Konwersja odczytanej daty na obiekt date #####
+    @staticmethod
+    def to_date(value) -> Optional[date]:
+        if value is None:
+            return None
+        if isinstance(value, str):
+            return date.fromisoformat(value[:10])
+        if isinstance(value, datetime):
+            return value.date()
+        return value
+
+    ##### Zapis w dzienniku zmian danych (w transakcji zapisu) #####
+    def log_change(self, conn, date_from: date):
+        conn.execute('INSERT INTO nbp_changes ("dateFrom") VALUES (?)', [self.to_param(date_from)])
+
+    ##### Metoda wstawiająca rekord do tabeli nbp_tables #####
+    def insert_table(self, table: Tables) -> int:
+        with self.transaction() as conn:
+            row = conn.execute('''INSERT INTO nbp_tables ("table", "no", "effectiveDate", "tradingDate")
+                                  VALUES (?, ?, ?, ?)
+                                  RETURNING "id"''',
+                               [table.table, table.no, self.to_param(table.effectiveDate), self.to_param(table.tradingDate)]).fetchone()
+            self.log_change(conn, table.effectiveDate)
+        return int(row[0])
+
+    ##### Metoda wstawiająca rekord do tabeli nbp_rates #####
+    def insert_rate(self, tableId: int, rate: Rates):
+        with self.transaction() as conn:
+            conn.execute('''INSERT INTO nbp_rates ("tableId", "currency", "code", "bid", "ask", "mid")
+                            VALUES (?, ?, ?, ?, ?, ?)''',
+                         [tableId, rate.currency, rate.code, rate.bid, rate.ask, rate.mid])
+            conn.execute('INSERT INTO nbp_changes ("dateFrom") SELECT "effectiveDate" FROM nbp_tables WHERE "id" = ?', [tableId])
+
+    ##### Metoda wstawiająca/aktualizująca paczkę tabel wraz z kursami (jedna transakcja) #####
+    def bulk_upsert_tables(self, tables: List[Tables]) -> int:
+        staged_tables = {(t.table, t.no): t for t in tables}
+        if not staged_tables:
+            return 0
+        with self.transaction() as conn:
+            rate_rows = {}
+            for t in staged_tables.values():
+                row = conn.execute('''INSERT INTO nbp_tables ("table", "no", "effectiveDate", "tradingDate")
+                                      VALUES (?, ?, ?, ?)
+                                      ON CONFLICT ("table", "no") DO UPDATE
+                                      SET "effectiveDate" = excluded."effectiveDate", "tradingDate" = excluded."tradingDate"
+                                      RETURNING "id"''',
+                                   [t.table, t.no, self.to_param(t.effectiveDate), self.to_param(t.tradingDate)]).fetchone()
+                for r in t.rates:
+                    rate_rows[(row[0], r.code)] = (row[0], r.currency, r.code, r.mid, r.bid, r.ask)
+            if rate_rows:
+                conn.executemany('''INSERT INTO nbp_rates ("tableId", "currency", "code", "mid", "bid", "ask")
+                                    VALUES (?, ?, ?, ?, ?, ?)
+                                    ON CONFLICT ("tableId", "code") DO UPDATE
+                                    SET "currency" = excluded."currency", "mid" = excluded."mid",
+                                        "bid" = excluded."bid", "ask" = excluded."ask"''',
+                                 list(rate_rows.values()))
+            # Wpis dziennika zmian - pamięci podręczne odświeżają dane od najwcześniejszej zmienionej daty (również poprawki kursów)
+            self.log_change(conn, min(t.effectiveDate for t in staged_tables.values()))
+        return len(staged_tables)
+
+    ##### Metoda sprawdzająca istnienie rekordu w tabeli nbp_tables (klucz: table, no) #####
+    def table_exists(self, table: Tables) -> bool:
+        return bool(self.query('SELECT 1 FROM nbp_tables WHERE "table" = ? AND "no" = ?', [table.table, table.no]))
+
+    ##### Metoda sprawdzająca istnienie rekordu w tabeli nbp_rates (klucz: tableId, code) #####
+    def rate_exists(self, tableId: int, rate: Rates) -> bool:
+        return bool(self.query('SELECT 1 FROM nbp_rates WHERE "tableId" = ? AND "code" = ?', [tableId, rate.code]))
+
+    ##### Metoda pobierająca datę ostatniego rekordu dla danego typu tabeli #####
+    def get_last_date(self, table_char: str) -> Optional[date]:
+        rows = self.query('SELECT MAX("effectiveDate") FROM nbp_tables WHERE "table" = ?', [table_char])
+        return self.to_date(rows[0][0]) if rows else None
+
+    ##### Metoda pobierająca znacznik ostatniej synchronizacji dla danego typu tabeli #####
+    def get_watermark(self, table_char: str) -> Optional[date]:
+        rows = self.query('SELECT "lastDate" FROM nbp_sync_state WHERE "table" = ?', [table_char])
+        return self.to_date(rows[0][0]) if rows else None
+
+    ##### Metoda zapisująca znacznik ostatniej synchronizacji dla danego typu tabeli #####
+    def set_watermark(self, table_char: str, last_date: date):
+        updated_at = datetime.now().replace(microsecond=0)
+        if self.engine == "sqlite":
+            updated_at = updated_at.isoformat(sep=" ")
+        with self.transaction() as conn:
+            conn.execute('''INSERT INTO nbp_sync_state ("table", "lastDate", "updatedAt")
+                            VALUES (?, ?, ?)
+                            ON CONFLICT ("table") DO UPDATE
+                            SET "lastDate" = excluded."lastDate", "updatedAt" = excluded."updatedAt"''',
+                         [table_char, self.to_param(last_date), updated_at])
+
+    ##### Metoda zakładająca blokadę synchronizacji (blokada systemowa pliku obok bazy - zwalniana przez system po zakończeniu procesu) #####
+    def acquire_sync_lock(self, resource: str = "NBP.Sync") -> bool:
+        if self.read_only or not self.sync_lock.acquire(blocking=False):
+            return False
+        if self.lock_path is None:
+            return True
+        fd = os.open(self.lock_path, os.O_CREAT | os.O_RDWR)
+        try:
+            if os.name == "nt":
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            # Blokadę posiada inny proces
+            os.close(fd)
+            self.sync_lock.release()
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode("ascii"))
+        self.lock_fd = fd
+        return True
+
+    ##### Metoda zwalniająca blokadę synchronizacji #####
+    def release_sync_lock(self, resource: str = "NBP.Sync"):
+        fd, self.lock_fd = self.lock_fd, None
+        if fd is not None:
+            try:
+                if os.name == "nt":
+                    os.lseek(fd, 0, os.SEEK_SET)
+                    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+                else:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+            finally:
+                os.close(fd)
+        try:
+            self.sync_lock.release()
+        except RuntimeError:
+            pass
+
+    ##### Metoda zwracająca wersję danych (data ostatniej wczytanej tabeli, liczba tabel, numer ostatniej zmiany) #####
+    def get_data_version(self) -> Tuple[Optional[date], int, int]:
+        rows = self.query('''SELECT MAX("effectiveDate"), COUNT(*), (SELECT COALESCE(MAX("generation"), 0) FROM nbp_changes)
+                             FROM nbp_tables''')
+        return (self.to_date(rows[0][0]), rows[0][1], rows[0][2]) if rows else (None, 0, 0)
+
+    ##### Metoda zwracająca najwcześniejszą datę notowania zmienioną po zmianie o podanym numerze #####
+    def get_changed_from(self, generation: int) -> Optional[date]:
+        rows = self.query('SELECT MIN("dateFrom") FROM nbp_changes WHERE "generation" > ?', [generation])
+        return self.to_date(rows[0][0]) if rows else None
+
+    ##### Zapytanie o kursy dla zakresu dat i walut (wspólne dla get_data i get_data_frame) #####
+    def data_query(self, course_type: str, date_from: date, date_to: date, currencies: list, columns: List[str]):
+        if course_type is not None and course_type != "" and course_type not in EXCHANGE_TYPES:
+            raise ValueError(f"Nieznany typ kursu: {course_type}")
+        filter_clause = f'AND r."{course_type}" IS NOT NULL' if course_type else ""
+        select_clause = ", ".join(f'{DATA_COLUMNS[column]} AS "{column}"' for column in columns)
+        sql = f'''SELECT {select_clause}
+                  FROM nbp_rates r
+                  JOIN nbp_tables t ON r."tableId" = t."id"
+                  WHERE t."effectiveDate" BETWEEN ? AND ?
+                  AND r."code" IN ({",".join("?" * len(currencies))})
+                  {filter_clause}
+                  ORDER BY r."code", t."effectiveDate"'''
+        return sql, [self.to_param(date_from), self.to_param(date_to)] + list(currencies)
+
+    ##### Metoda pobierająca dane z bazy dla danego zakresu dat i typu tabeli #####
+    def get_data(self, course_type: str, date_from: date, date_to: date, currencies: list) -> list:
+        sql, params = self.data_query(course_type, date_from, date_to, currencies, DATA_COLUMN_NAMES)
+        return [tuple(row) for row in self.query(sql, params)]
+
+    ##### Metoda pobierająca dane jako DataFrame (DuckDB - wynik kolumnowy, SQLite - paczki fetchmany) #####
+    def get_data_frame(self, course_type: str, date_from: date, date_to: date, currencies: list,
+                       columns: List[str] = None, chunk_size: int = 50000) -> pd.DataFrame:
+        columns = list(columns or DATA_COLUMN_NAMES)
+        unknown = [column for column in columns if column not in DATA_COLUMNS]
+        if unknown:
+            raise ValueError(f"Nieznane kolumny: {unknown}")
+        sql, params = self.data_query(course_type, date_from, date_to, currencies, columns)
+        return self.read_frame(sql, params, columns, chunk_size)
+
+    ##### Metoda zwracająca dane jako kolejne paczki DataFrame (blokada połączenia tylko na czas odczytu paczki) #####
+    def iter_data_chunks(self, course_type: str, date_from: date, date_to: date, currencies: list,
+                         columns: List[str] = None, chunk_size: int = 50000) -> Iterator[pd.DataFrame]:
+        columns = list(columns or DATA_COLUMN_NAMES)
+        unknown = [column for column in columns if column not in DATA_COLUMNS]
+        if unknown:
+            raise ValueError(f"Nieznane kolumny: {unknown}")
+        sql, params = self.data_query(course_type, date_from, date_to, currencies, columns)
+        with self.lock:
+            cursor = self.conn.cursor()
+            cursor.execute(sql, params)
+        try:
+            while True:
+                with self.lock:
+                    rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield frame_from_chunks([rows], columns)
+        finally:
+            cursor.close()
+
+    ##### Odczyt wyniku zapytania do DataFrame z typowanymi kolumnami #####
+    def read_frame(self, sql: str, params: list, columns: List[str], chunk_size: int = 50000) -> pd.DataFrame:
+        with self.lock:
+            cursor = self.conn.execute(sql, params)
+            if self.engine == "duckdb":
+                return cast_frame(cursor.df(), columns)
+            return frame_from_chunks(iter(lambda: cursor.fetchmany(chunk_size), []), columns)
+
+    ##### Metoda pobierająca kursy od daty `since` wraz z `tail` poprzednimi notowaniami każdej waluty #####
+    def get_stats_source(self, exchange_type: str, since: Optional[date], tail: int) -> pd.DataFrame:
+        if exchange_type not in EXCHANGE_TYPES:
+            raise ValueError(f"Nieznany typ kursu: {exchange_type}")
+        columns = ["code", "effectiveDate", "value"]
+        if since is None:
+            sql = f'''SELECT r."code" AS "code", t."effectiveDate" AS "effectiveDate", r."{exchange_type}" AS "value"
+                      FROM nbp_rates r
+                      JOIN nbp_tables t ON r."tableId" = t."id"
+                      WHERE r."{exchange_type}" IS NOT NULL
+                      ORDER BY r."code", t."effectiveDate"'''
+            return self.read_frame(sql, [], columns)
+
+        since = self.to_date(since)
+        sql = f'''SELECT "code", "effectiveDate", "value"
+                  FROM (
+                      SELECT r."code" AS "code", t."effectiveDate" AS "effectiveDate", r."{exchange_type}" AS "value",
+                             ROW_NUMBER() OVER (PARTITION BY r."code", t."effectiveDate" >= ?
+                                                ORDER BY t."effectiveDate" DESC) AS "rn",
+                             t."effectiveDate" >= ? AS "isNew"
+                      FROM nbp_rates r
+                      JOIN nbp_tables t ON r."tableId" = t."id"
+                      WHERE r."{exchange_type}" IS NOT NULL
+                      AND t."effectiveDate" >= ?
+                  ) s
+                  WHERE "isNew" OR "rn" <= ?
+                  ORDER BY "code", "effectiveDate"'''
+        lookback = since - timedelta(days=(tail + 2) * 7)
+        return self.read_frame(sql, [self.to_param(since), self.to_param(since), self.to_param(lookback), tail], columns)
+
+    ##### Metoda zapisująca (upsert) statystyki dzienne jednego typu kursu w jednej transakcji #####
+    def upsert_daily_stats(self, exchange_type: str, stats: pd.DataFrame) -> int:
+        if stats.empty:
+            return 0
+        clean = stats[STATS_COLUMNS].astype(object).where(stats[STATS_COLUMNS].notna(), None)
+        rows = [(exchange_type, code, self.to_param(effective_date.to_pydatetime()), value, change, mean, std)
+                for effective_date, code, value, change, mean, std in clean.itertuples(index=False, name=None)]
+        with self.transaction() as conn:
+            conn.executemany('''INSERT INTO nbp_daily_stats ("exchangeType", "code", "effectiveDate", "value",
+                                                             "changePct", "rollingMean", "rollingStd")
+                                VALUES (?, ?, ?, ?, ?, ?, ?)
+                                ON CONFLICT ("exchangeType", "code", "effectiveDate") DO UPDATE
+                                SET "value" = excluded."value", "changePct" = excluded."changePct",
+                                    "rollingMean" = excluded."rollingMean", "rollingStd" = excluded."rollingStd"''',
+                             rows)
+        return len(rows)
+
+    ##### Metoda pobierająca gotowe statystyki dzienne dla zakresu dat i walut #####
+    def get_daily_stats(self, exchange_type: str, date_from: date, date_to: date, currencies: list) -> pd.DataFrame:
+        sql = f'''SELECT "effectiveDate", "code", "value", "changePct", "rollingMean", "rollingStd"
+                  FROM nbp_daily_stats
+                  WHERE "exchangeType" = ?
+                  AND "effectiveDate" BETWEEN ? AND ?
+                  AND "code" IN ({",".join("?" * len(currencies))})
+                  ORDER BY "code", "effectiveDate"'''
+        params = [exchange_type, self.to_param(date_from), self.to_param(date_to)] + list(currencies)
+        return self.read_frame(sql, params, STATS_COLUMNS)
+
+    ##### Metoda pobierająca listę unikalnych walut #####
+    def get_currencies(self) -> list:
+        return [row[0] for row in self.query('SELECT DISTINCT "code" FROM nbp_rates ORDER BY "code"')]
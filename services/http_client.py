@@ -0,0 +1,157 @@
+import codecs
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from utils.json_to_model import iter_json_array
+from utils.metrics import increment
+
+class RateLimiter:
+    ##### Ogranicznik liczby zapytań (token bucket) współdzielony przez wątki #####
+    def __init__(self, rate_per_second: float, burst: int = 1):
+        self.rate = rate_per_second
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    ##### Metoda blokująca do momentu uzyskania prawa do wykonania zapytania #####
+    def acquire(self):
+        if not self.rate or self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class HttpClient:
+    ##### Konstruktor klienta HTTP (pula połączeń, limity czasu, ponowienia, ograniczenie częstotliwości) #####
+    def __init__(self, timeout: tuple = (3.05, 15), retries: int = 3, backoff_factor: float = 0.5,
+                 pool_size: int = 8, rate_limit_per_second: float = 10.0, max_validators: int = 256,
+                 stream_decode: bool = False, stream_chunk_size: int = 65536):
+        self.timeout = tuple(timeout)
+        self.stream_decode = stream_decode
+        self.stream_chunk_size = stream_chunk_size
+        self.rate_limiter = RateLimiter(rate_limit_per_second, burst=pool_size)
+        self.max_validators = max_validators
+        self.validators = OrderedDict()
+        self.lock = threading.Lock()
+        self.metrics = {"requests": 0, "not_modified": 0, "errors": 0, "bytes": 0, "latency_seconds": 0.0}
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET"]),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.headers.update({"Accept": "application/json"})
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    ##### Tworzy klienta na podstawie sekcji "nbp_api" z appsettings.json #####
+    @classmethod
+    def from_settings(cls, settings: dict) -> "HttpClient":
+        return cls(
+            timeout=settings.get("timeout", (3.05, 15)),
+            retries=settings.get("retries", 3),
+            backoff_factor=settings.get("backoff_factor", 0.5),
+            pool_size=settings.get("pool_size", 8),
+            rate_limit_per_second=settings.get("rate_limit_per_second", 10.0),
+            stream_decode=settings.get("stream_decode", False),
+        )
+
+    ##### Pobiera JSON; odpowiedź 304 (ETag / Last-Modified) zwraca poprzednio pobraną treść #####
+    def get_json(self, url: str):
+        headers = {}
+        with self.lock:
+            cached = self.validators.get(url)
+            if cached is not None:
+                self.validators.move_to_end(url)
+        if cached is not None:
+            etag, last_modified, _ = cached
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        self.rate_limiter.acquire()
+        started = time.perf_counter()
+        received = [0]
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout, stream=self.stream_decode)
+            if self.stream_decode and response.status_code == 200:
+                # Dekodowanie przyrostowe - pełna treść odpowiedzi nie jest buforowana w pamięci
+                payload = list(iter_json_array(self._iter_text(response, received)))
+            else:
+                payload = None
+                received[0] = len(response.content)
+        except requests.RequestException:
+            self._record(time.perf_counter() - started, received[0], error=True)
+            raise
+        self._record(time.perf_counter() - started, received[0],
+                     error=response.status_code not in (200, 304, 404), not_modified=response.status_code == 304)
+
+        if response.status_code == 304 and cached is not None:
+            return cached[2]
+        if response.status_code == 404:
+            return []
+        if response.status_code != 200:
+            raise Exception(f"Błąd {response.status_code}: {response.text}")
+
+        if payload is None:
+            payload = response.json()
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            with self.lock:
+                self.validators[url] = (etag, last_modified, payload)
+                self.validators.move_to_end(url)
+                while len(self.validators) > self.max_validators:
+                    self.validators.popitem(last=False)
+        return payload
+
+    ##### Kolejne fragmenty treści odpowiedzi jako tekst (z licznikiem odebranych bajtów) #####
+    def _iter_text(self, response, received: list):
+        decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")()
+        for chunk in response.iter_content(chunk_size=self.stream_chunk_size):
+            received[0] += len(chunk)
+            yield decoder.decode(chunk)
+        yield decoder.decode(b"", final=True)
+
+    ##### Zapis metryk pojedynczego zapytania #####
+    def _record(self, elapsed: float, size: int, error: bool = False, not_modified: bool = False):
+        increment("http.requests")
+        increment("http.bytes", size)
+        if error:
+            increment("http.errors")
+        if not_modified:
+            increment("http.not_modified")
+        with self.lock:
+            self.metrics["requests"] += 1
+            self.metrics["bytes"] += size
+            self.metrics["latency_seconds"] += elapsed
+            if error:
+                self.metrics["errors"] += 1
+            if not_modified:
+                self.metrics["not_modified"] += 1
+
+    ##### Zwraca kopię metryk (liczba zapytań, czas, przesłane bajty) #####
+    def get_metrics(self) -> dict:
+        with self.lock:
+            metrics = dict(self.metrics)
+        metrics["avg_latency_seconds"] = metrics["latency_seconds"] / metrics["requests"] if metrics["requests"] else 0.0
+        return metrics
@@ -0,0 +1,188 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from logging import Logger
+from typing import Callable, Dict, List, Tuple
+
+from models.tables import Tables
+from services.api_service import ApiService
+from utils.json_to_model import json_to_models
+
+##### Znacznik końca strumienia w kolejkach pomiędzy etapami #####
+END = object()
+
+##### Zadanie potoku: typ tabeli i okno dat (API NBP - do 93 dni) #####
+Window = Tuple[str, date, date]
+
+class StageMetrics:
+    ##### Liczniki jednego etapu potoku (okna, tabele, czas pracy i oczekiwania na kolejkę) #####
+    def __init__(self):
+        self.windows = 0
+        self.tables = 0
+        self.busy_seconds = 0.0
+        self.blocked_seconds = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "windows": self.windows,
+            "tables": self.tables,
+            "busy_seconds": self.busy_seconds,
+            "blocked_seconds": self.blocked_seconds,
+            "tables_per_second": self.tables / self.busy_seconds if self.busy_seconds else 0.0,
+        }
+
+class IngestPipeline:
+    ##### Konstruktor potoku pobieranie → parsowanie → zapis (etapy w osobnych wątkach, kolejki ograniczone) #####
+    def __init__(self, api_service: ApiService, logger: Logger, load_window: Callable[[str, List[Tables], date, date], int],
+                 fetch_workers: int = 4, queue_size: int = 4):
+        self.api_service = api_service
+        self.logger = logger
+        self.load_window = load_window
+        self.fetch_workers = max(1, fetch_workers)
+        self.queue_size = max(1, queue_size)
+        self.metrics = {"fetch": StageMetrics(), "parse": StageMetrics(), "load": StageMetrics()}
+        self.stop_event = threading.Event()
+
+    ##### Okna do pobrania w kolejności dat (per typ tabeli) #####
+    def windows(self, ranges: Dict[str, Tuple[date, date]]) -> List[Window]:
+        return [(table_char, window_start, window_end) for table_char, (date_from, date_to) in ranges.items()
+                for window_start, window_end in self.api_service.split_range(date_from, date_to)]
+
+    ##### Wstawia element do kolejki, blokując przy jej zapełnieniu (przeciwciśnienie) do momentu zatrzymania #####
+    def put(self, target: queue.Queue, item, stage: str) -> bool:
+        started = time.perf_counter()
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    target.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        finally:
+            self.metrics[stage].blocked_seconds += time.perf_counter() - started
+
+    ##### Etap 1: pobieranie okien (najwyżej `queue_size` zapytań w toku, wyniki w kolejności okien) #####
+    def fetch_stage(self, windows: List[Window], output: queue.Queue):
+        try:
+            metrics = self.metrics["fetch"]
+            pending = deque()
+            with ThreadPoolExecutor(max_workers=self.fetch_workers, thread_name_prefix="nbp-fetch") as executor:
+                jobs = iter(windows)
+                while not self.stop_event.is_set():
+                    while len(pending) < self.queue_size:
+                        job = next(jobs, None)
+                        if job is None:
+                            break
+                        table_char, window_start, window_end = job
+                        pending.append((job, executor.submit(
+                            self.api_service.get_tables, table_char, window_start.isoformat(), window_end.isoformat())))
+                    if not pending:
+                        break
+                    job, future = pending.popleft()
+                    started = time.perf_counter()
+                    try:
+                        result = (job, future.result(), None)
+                    except Exception as ex:
+                        result = (job, None, ex)
+                    metrics.busy_seconds += time.perf_counter() - started
+                    metrics.windows += 1
+                    metrics.tables += len(result[1] or [])
+                    if not self.put(output, result, "fetch"):
+                        break
+                for _, future in pending:
+                    future.cancel()
+        except Exception as ex:
+            self.logger.exception(f"Błąd etapu pobierania potoku synchronizacji: {ex}")
+        finally:
+            # Znacznik końca również po błędzie etapu - kolejne etapy nie czekają w nieskończoność
+            self.put(output, END, "fetch")
+
+    ##### Etap 2: konwersja odpowiedzi JSON na obiekty modelu #####
+    def parse_stage(self, source: queue.Queue, output: queue.Queue):
+        try:
+            metrics = self.metrics["parse"]
+            while not self.stop_event.is_set():
+                try:
+                    item = source.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if item is END:
+                    break
+                job, payload, error = item
+                started = time.perf_counter()
+                tables = None
+                if error is None:
+                    try:
+                        tables = json_to_models(payload)
+                    except Exception as ex:
+                        error = ex
+                metrics.busy_seconds += time.perf_counter() - started
+                metrics.windows += 1
+                metrics.tables += len(tables or [])
+                if not self.put(output, (job, tables, error), "parse"):
+                    break
+        except Exception as ex:
+            self.logger.exception(f"Błąd etapu parsowania potoku synchronizacji: {ex}")
+        finally:
+            self.put(output, END, "parse")
+
+    ##### Etap 3 (wątek wywołujący): zapis okien w kolejności; błąd okna wstrzymuje dalsze okna danego typu tabeli #####
+    def run(self, ranges: Dict[str, Tuple[date, date]]) -> int:
+        windows = self.windows(ranges)
+        if not windows:
+            return 0
+        self.stop_event.clear()
+        fetched = queue.Queue(maxsize=self.queue_size)
+        parsed = queue.Queue(maxsize=self.queue_size)
+        threads = [
+            threading.Thread(target=self.fetch_stage, args=(windows, fetched), name="nbp-pipeline-fetch", daemon=True),
+            threading.Thread(target=self.parse_stage, args=(fetched, parsed), name="nbp-pipeline-parse", daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+
+        metrics = self.metrics["load"]
+        failed = set()
+        inserted = 0
+        try:
+            while True:
+                try:
+                    item = parsed.get(timeout=0.5)
+                except queue.Empty:
+                    # Zabezpieczenie: etap parsowania zakończony bez znacznika końca
+                    if not threads[-1].is_alive() and parsed.empty():
+                        self.logger.error("Etap parsowania potoku synchronizacji zakończył się bez znacznika końca.")
+                        break
+                    continue
+                if item is END:
+                    break
+                (table_char, window_start, window_end), tables, error = item
+                if table_char in failed:
+                    continue
+                if error is not None:
+                    failed.add(table_char)
+                    self.logger.error(f"Błąd podczas pobierania tabeli {table_char} ({window_start} - {window_end}): {error}")
+                    continue
+                started = time.perf_counter()
+                try:
+                    # Zapis okna wraz ze znacznikiem synchronizacji - przerwana synchronizacja wznowi się od kolejnego okna
+                    inserted += self.load_window(table_char, tables, window_start, window_end)
+                except Exception as ex:
+                    failed.add(table_char)
+                    self.logger.exception(f"Błąd podczas synchronizacji tabeli {table_char}: {ex}")
+                metrics.busy_seconds += time.perf_counter() - started
+                metrics.windows += 1
+                metrics.tables += len(tables)
+        finally:
+            self.stop_event.set()
+            for thread in threads:
+                thread.join()
+        return inserted
+
+    ##### Zwraca liczniki etapów potoku #####
+    def get_metrics(self) -> Dict[str, dict]:
+        return {stage: metrics.to_dict() for stage, metrics in self.metrics.items()}
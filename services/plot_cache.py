@@ -0,0 +1,222 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from services.storage_service import StorageService
+from utils.analytics import RateMatrix
+from utils.metrics import increment
+
+##### Funkcja wczytująca kursy: (typ kursu, data od, data do, waluty) -> DataFrame [effectiveDate, code, kurs] #####
+Loader = Callable[[str, date, date, list], pd.DataFrame]
+
+class Segment:
+    ##### Ciągły fragment serii jednej waluty (zakres dat objęty zapytaniami) wraz z wyliczonymi statystykami #####
+    __slots__ = ("start", "end", "dates", "values", "change", "mean", "std")
+
+    def __init__(self, start: date, end: date, dates: np.ndarray, values: np.ndarray,
+                 change: np.ndarray, mean: np.ndarray, std: np.ndarray):
+        self.start = start
+        self.end = end
+        self.dates = dates
+        self.values = values
+        self.change = change
+        self.mean = mean
+        self.std = std
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in (self.dates, self.values, self.change, self.mean, self.std))
+
+class PlotCache:
+    ##### Konstruktor pamięci podręcznej obliczeń wykresów per (typ kursu, waluta, okno), wspólnej dla sesji procesu #####
+    def __init__(self, storage: StorageService, max_bytes: int = 256 * 2 ** 20, version_check_seconds: int = 30):
+        self.storage = storage
+        self.max_bytes = max_bytes
+        self.version_check_seconds = version_check_seconds
+        self.segments: "OrderedDict[Tuple[str, str, int], Segment]" = OrderedDict()
+        self.nbytes = 0
+        self.lock = threading.Lock()
+        self.version = None
+        self.checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    ##### Statystyki serii jednej waluty: zmiana dzienna [%], średnia krocząca i odchylenie zmian [%] #####
+    @staticmethod
+    def compute(code: str, dates: np.ndarray, values: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        matrix = RateMatrix(np.array([code]), np.zeros(len(values), dtype=np.intp), dates, values)
+        change = matrix.pct_change()
+        return change * 100, matrix.rolling_mean(window), matrix.rolling_std(window, change) * 100
+
+    ##### Po zmianie danych obcina segmenty do dnia poprzedzającego najwcześniejszą zmienioną datę (dziennik zmian) #####
+    def refresh_version(self):
+        now = time.monotonic()
+        if now - self.checked_at < self.version_check_seconds:
+            return
+        version = self.storage.get_data_version()
+        previous = self.version
+        if version == previous:
+            self.checked_at = now
+            return
+        # Dziennik obejmuje nowe tabele, tabele dopisane do starszej historii i poprawki istniejących kursów
+        changed_from = self.storage.get_changed_from(previous[2]) if previous is not None and version[2] > previous[2] else None
+        if isinstance(changed_from, datetime):
+            changed_from = changed_from.date()
+        with self.lock:
+            self.checked_at = now
+            if self.version != previous:
+                # Zmianę wersji obsłużyła w międzyczasie inna sesja
+                return
+            self.version = version
+            if changed_from is None:
+                self.segments.clear()
+                self.nbytes = 0
+                return
+            cutoff = changed_from - timedelta(days=1)
+            for key, segment in list(self.segments.items()):
+                if segment.end <= cutoff:
+                    continue
+                self.nbytes -= segment.nbytes
+                if segment.start > cutoff:
+                    del self.segments[key]
+                    continue
+                # Nowy obiekt zamiast modyfikacji - segment może być właśnie odczytywany przez inną sesję
+                keep = np.searchsorted(segment.dates, np.datetime64(cutoff, "ns"), side="right")
+                trimmed = Segment(segment.start, cutoff, *(getattr(segment, name)[:keep] for name in Segment.__slots__[2:]))
+                self.segments[key] = trimmed
+                self.nbytes += trimmed.nbytes
+
+    ##### Dzieli wczytany DataFrame na serie per waluta (daty datetime64[ns], kursy float64) #####
+    @staticmethod
+    def split(df: pd.DataFrame, exchange: str) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        if df.empty:
+            return {}
+        codes = df["code"].to_numpy(dtype=object)
+        dates = df["effectiveDate"].to_numpy(dtype="datetime64[ns]")
+        values = df[exchange].to_numpy(dtype=np.float64)
+        order = np.lexsort((dates, codes))
+        codes, dates, values = codes[order], dates[order], values[order]
+        boundaries = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+        starts = np.concatenate(([0], boundaries))
+        ends = np.concatenate((boundaries, [len(codes)]))
+        return {str(codes[start]): (dates[start:end], values[start:end]) for start, end in zip(starts, ends)}
+
+    ##### Rozszerza segment o wczytany początek (przeliczenie całości) lub koniec (przeliczenie ogona z oknem poprzedzającym) #####
+    def extend(self, code: str, segment: Segment, window: int, start: date, end: date,
+               head: Tuple[np.ndarray, np.ndarray], tail: Tuple[np.ndarray, np.ndarray]) -> Segment:
+        if len(head[0]) == 0 and len(tail[0]) == 0:
+            return Segment(start, end, segment.dates, segment.values, segment.change, segment.mean, segment.std)
+        dates = np.concatenate((head[0], segment.dates, tail[0]))
+        values = np.concatenate((head[1], segment.values, tail[1]))
+        if len(head[0]):
+            return Segment(start, end, dates, values, *self.compute(code, dates, values, window))
+
+        context = min(len(segment.values), window)
+        tail_values = np.concatenate((segment.values[len(segment.values) - context:], tail[1]))
+        tail_dates = np.concatenate((segment.dates[len(segment.dates) - context:], tail[0]))
+        change, mean, std = (array[context:] for array in self.compute(code, tail_dates, tail_values, window))
+        return Segment(start, end, dates, values, np.concatenate((segment.change, change)),
+                       np.concatenate((segment.mean, mean)), np.concatenate((segment.std, std)))
+
+    ##### Zapis segmentu z limitem pamięci (usuwanie najdawniej używanych) #####
+    def store(self, key: Tuple[str, str, int], segment: Segment, expected: Optional[Segment]):
+        with self.lock:
+            current = self.segments.get(key)
+            # Inna sesja zaktualizowała segment w międzyczasie - zachowany zostaje jej wynik
+            if current is not expected:
+                return
+            if current is not None:
+                self.nbytes -= current.nbytes
+            self.segments[key] = segment
+            self.segments.move_to_end(key)
+            self.nbytes += segment.nbytes
+            while self.nbytes > self.max_bytes and len(self.segments) > 1:
+                _, evicted = self.segments.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+
+    ##### Kursy i statystyki dla zakresu dat i walut; z bazy wczytywane są jedynie brakujące fragmenty #####
+    def get(self, exchange: str, date_from: date, date_to: date, currencies: list, window: int, loader: Loader) -> pd.DataFrame:
+        self.refresh_version()
+        codes = sorted(set(currencies))
+        with self.lock:
+            cached = {code: self.segments.get((exchange, code, window)) for code in codes}
+            for code, segment in cached.items():
+                if segment is not None:
+                    self.segments.move_to_end((exchange, code, window))
+
+        # Plan zapytań: brakujące waluty w całości, brakujący początek i koniec segmentów (grupowane po zakresie dat)
+        requests: Dict[Tuple[date, date], List[str]] = {}
+        for code, segment in cached.items():
+            if segment is None:
+                requests.setdefault((date_from, date_to), []).append(code)
+                continue
+            if date_from < segment.start:
+                requests.setdefault((date_from, segment.start - timedelta(days=1)), []).append(code)
+            if date_to > segment.end:
+                requests.setdefault((segment.end + timedelta(days=1), date_to), []).append(code)
+
+        loaded: Dict[Tuple[date, date], Dict[str, Tuple[np.ndarray, np.ndarray]]] = {
+            (start, end): self.split(loader(exchange, start, end, request_codes), exchange)
+            for (start, end), request_codes in requests.items()
+        }
+        empty = (np.empty(0, dtype="datetime64[ns]"), np.empty(0))
+        with self.lock:
+            if requests:
+                self.misses += 1
+            else:
+                self.hits += 1
+        increment("plot_cache.misses" if requests else "plot_cache.hits")
+
+        segments = {}
+        for code, segment in cached.items():
+            if segment is None:
+                dates, values = loaded[(date_from, date_to)].get(code, empty)
+                updated = Segment(date_from, date_to, dates, values, *self.compute(code, dates, values, window))
+            elif date_from < segment.start or date_to > segment.end:
+                start, end = min(date_from, segment.start), max(date_to, segment.end)
+                head = loaded[(date_from, segment.start - timedelta(days=1))].get(code, empty) if date_from < segment.start else empty
+                tail = loaded[(segment.end + timedelta(days=1), date_to)].get(code, empty) if date_to > segment.end else empty
+                updated = self.extend(code, segment, window, start, end, head, tail)
+            else:
+                segments[code] = segment
+                continue
+            self.store((exchange, code, window), updated, segment)
+            segments[code] = updated
+
+        return self.frame(exchange, date_from, date_to, segments, window)
+
+    ##### Wycinek segmentów dla zakresu dat; pierwsze notowania wycinka maskowane jak przy obliczeniu na samym zakresie #####
+    @staticmethod
+    def frame(exchange: str, date_from: date, date_to: date, segments: Dict[str, Segment], window: int) -> pd.DataFrame:
+        low = np.datetime64(date_from, "ns")
+        high = np.datetime64(date_to + timedelta(days=1), "ns")
+        labels, counts, parts = [], [], []
+        for code, segment in segments.items():
+            start = np.searchsorted(segment.dates, low, side="left")
+            end = np.searchsorted(segment.dates, high, side="left")
+            if end <= start:
+                continue
+            positions = np.arange(end - start)
+            change = np.where(positions < 1, np.nan, segment.change[start:end])
+            mean = np.where(positions < window - 1, np.nan, segment.mean[start:end])
+            std = np.where(positions < window, np.nan, segment.std[start:end])
+            labels.append(code)
+            counts.append(end - start)
+            parts.append((segment.dates[start:end], segment.values[start:end], change, mean, std))
+
+        def column(index: int, dtype) -> np.ndarray:
+            return np.concatenate([part[index] for part in parts]) if parts else np.empty(0, dtype=dtype)
+
+        return pd.DataFrame({
+            "effectiveDate": column(0, "datetime64[ns]"),
+            "code": pd.Categorical.from_codes(np.repeat(np.arange(len(labels), dtype=np.int32), counts), categories=labels),
+            exchange: column(1, np.float64),
+            "changePct": column(2, np.float64),
+            "rollingMean": column(3, np.float64),
+            "rollingStd": column(4, np.float64),
+        })
@@ -0,0 +1,166 @@
+import os
+import threading
+import time
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from services.storage_service import StorageService
+
+##### Seria kursów jednej waluty: posortowane daty (datetime64[D]) i wartości (float64) #####
+Series = Tuple[np.ndarray, np.ndarray]
+
+class RateStore:
+    ##### Konstruktor magazynu kursów w pamięci procesu (tablice per typ kursu i waluta, indeks dat) #####
+    def __init__(self, storage: StorageService, exchanges: List[str], version_check_seconds: int = 30):
+        self.storage = storage
+        self.exchanges = exchanges
+        self.version_check_seconds = version_check_seconds
+        self.series: Dict[str, Dict[str, Series]] = {exchange: {} for exchange in exchanges}
+        self.version = None
+        self.generation: Optional[int] = None
+        self.checked_at = 0.0
+        self.lock = threading.Lock()
+
+    ##### Dzieli posortowany (code, effectiveDate) DataFrame na serie per waluta #####
+    @staticmethod
+    def split_series(df: pd.DataFrame, exchange: str) -> Dict[str, Series]:
+        codes = df["code"].to_numpy(dtype=object)
+        dates = df["effectiveDate"].to_numpy(dtype="datetime64[D]")
+        values = df[exchange].to_numpy(dtype=np.float64)
+        boundaries = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+        starts = np.concatenate(([0], boundaries))
+        ends = np.concatenate((boundaries, [len(codes)]))
+        return {str(codes[start]): (dates[start:end].copy(), values[start:end].copy())
+                for start, end in zip(starts, ends) if end > start}
+
+    ##### Wczytuje kursy od daty `date_from` (None - cała historia) z magazynu danych #####
+    def fetch(self, date_from: Optional[date]) -> Dict[str, Dict[str, Series]]:
+        currencies = self.storage.get_currencies()
+        fetched = {}
+        for exchange in self.exchanges:
+            df = self.storage.get_data_frame(exchange, date_from or date.min, date.max, currencies,
+                                             ["effectiveDate", "code", exchange]) if currencies else pd.DataFrame()
+            fetched[exchange] = self.split_series(df, exchange) if not df.empty else {}
+        return fetched
+
+    ##### Pełne wczytanie historii (jednokrotnie na proces lub gdy zmian nie da się odtworzyć z dziennika) #####
+    def load(self):
+        # Wersja odczytywana przed danymi - zmiany zapisane w trakcie zostaną doczytane przy kolejnym odświeżeniu
+        version = self.storage.get_data_version()
+        series = self.fetch(None)
+        with self.lock:
+            self.series = series
+            self.version = version
+            self.generation = version[2]
+            self.checked_at = time.monotonic()
+
+    ##### Przyrostowe odświeżenie po zmianie danych (serie od najwcześniejszej zmienionej daty z dziennika zmian) #####
+    def refresh(self, force: bool = False) -> bool:
+        now = time.monotonic()
+        if not force and now - self.checked_at < self.version_check_seconds:
+            return False
+        version = self.storage.get_data_version()
+        self.checked_at = now
+        if version == self.version:
+            return False
+        if self.generation is not None and version[2] == self.generation and self.version is None:
+            # Migawka aktualna - od jej zapisu dane w bazie nie zmieniły się
+            self.version = version
+            return False
+        # Dziennik obejmuje nowe tabele, tabele dopisane do starszej historii i poprawki istniejących kursów
+        changed_from = self.storage.get_changed_from(self.generation) \
+            if self.generation is not None and version[2] > self.generation else None
+        if changed_from is None:
+            self.load()
+            return True
+
+        changed_from = self.to_date(changed_from)
+        fetched = self.fetch(changed_from)
+        cutoff64 = np.datetime64(changed_from, "D")
+        with self.lock:
+            series = {exchange: dict(by_code) for exchange, by_code in self.series.items()}
+            for exchange, by_code in fetched.items():
+                current = series.setdefault(exchange, {})
+                for code, (new_dates, new_values) in by_code.items():
+                    old_dates, old_values = current.get(code, (np.empty(0, "datetime64[D]"), np.empty(0)))
+                    keep = np.searchsorted(old_dates, cutoff64, side="left")
+                    current[code] = (np.concatenate((old_dates[:keep], new_dates)),
+                                     np.concatenate((old_values[:keep], new_values)))
+            self.series = series
+            self.version = version
+            self.generation = version[2]
+        return True
+
+    ##### Kursy dla zakresu dat i walut (wyszukiwanie binarne w posortowanych datach) #####
+    def query(self, exchange: str, date_from: date, date_to: date, currencies: list) -> pd.DataFrame:
+        by_code = self.series.get(exchange, {})
+        low = np.datetime64(date_from, "D")
+        high = np.datetime64(date_to, "D")
+        labels, counts, dates, values = [], [], [], []
+        for code in sorted(currencies):
+            if code not in by_code:
+                continue
+            series_dates, series_values = by_code[code]
+            start = np.searchsorted(series_dates, low, side="left")
+            end = np.searchsorted(series_dates, high, side="right")
+            if end > start:
+                labels.append(code)
+                counts.append(end - start)
+                dates.append(series_dates[start:end])
+                values.append(series_values[start:end])
+
+        return pd.DataFrame({
+            "effectiveDate": np.concatenate(dates).astype("datetime64[ns]") if dates else np.empty(0, "datetime64[ns]"),
+            "code": pd.Categorical.from_codes(np.repeat(np.arange(len(labels), dtype=np.int32), counts), categories=labels),
+            exchange: np.concatenate(values) if values else np.empty(0),
+        })
+
+    ##### Zapis migawki magazynu do pliku .npz (plik tymczasowy i podmiana - migawka zawsze kompletna) #####
+    def save_snapshot(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        arrays = {}
+        with self.lock:
+            for exchange, by_code in self.series.items():
+                for code, (dates, values) in by_code.items():
+                    arrays[f"{exchange}/{code}/dates"] = dates
+                    arrays[f"{exchange}/{code}/values"] = values
+            if self.generation is not None:
+                arrays["meta/generation"] = np.array([self.generation], dtype=np.int64)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(temp_path, path)
+
+    ##### Wczytanie migawki z pliku .npz (kolejne odświeżenie pobierze z bazy jedynie dane zmienione od zapisu migawki) #####
+    def load_snapshot(self, path: str) -> bool:
+        if not os.path.exists(path):
+            return False
+        series: Dict[str, Dict[str, Series]] = {exchange: {} for exchange in self.exchanges}
+        generation = None
+        with np.load(path, allow_pickle=False) as snapshot:
+            for key in snapshot.files:
+                if key.startswith("meta/"):
+                    if key == "meta/generation":
+                        generation = int(snapshot[key][0])
+                    continue
+                exchange, code, kind = key.split("/")
+                if kind != "dates" or exchange not in series:
+                    continue
+                series[exchange][code] = (snapshot[key], snapshot[f"{exchange}/{code}/values"])
+        with self.lock:
+            self.series = series
+            self.generation = generation
+            self.version = None
+            self.checked_at = 0.0
+        return True
+
+    @staticmethod
+    def to_date(value) -> Optional[date]:
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, str):
+            return date.fromisoformat(value[:10])
+        return value
@@ -0,0 +1,72 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+
+from services.storage_service import StorageService
+from utils.metrics import increment
+
+class ReadCache:
+    ##### Konstruktor pamięci podręcznej odczytów z bazy, unieważnianej po wczytaniu nowych tabel #####
+    def __init__(self, storage: StorageService, version_check_seconds: int = 30, max_entries: int = 128):
+        self.storage = storage
+        self.version_check_seconds = version_check_seconds
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.version = None
+        self.checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    ##### Metoda sprawdzająca (nie częściej niż co version_check_seconds) czy w bazie pojawiły się nowe dane #####
+    def refresh_version(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self.checked_at < self.version_check_seconds:
+            return
+        version = self.storage.get_data_version()
+        with self.lock:
+            self.checked_at = now
+            if version != self.version:
+                self.version = version
+                self.entries.clear()
+
+    ##### Metoda zwracająca wynik z pamięci podręcznej lub wyliczająca go i zapamiętująca #####
+    def get_or_load(self, key: tuple, loader):
+        self.refresh_version()
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                increment("read_cache.hits")
+                return self.entries[key]
+            self.misses += 1
+            version = self.version
+        increment("read_cache.misses")
+
+        value = loader()
+        with self.lock:
+            if version == self.version:
+                self.entries[key] = value
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+        return value
+
+    ##### Lista walut (odczyt przez pamięć podręczną) #####
+    def get_currencies(self) -> list:
+        return self.get_or_load(("currencies",), self.storage.get_currencies)
+
+    ##### Dane kursów (odczyt przez pamięć podręczną) #####
+    def get_data(self, course_type: str, date_from: date, date_to: date, currencies: list) -> list:
+        key = ("data", course_type, date_from, date_to, tuple(currencies))
+        return self.get_or_load(key, lambda: self.storage.get_data(course_type, date_from, date_to, list(currencies)))
+
+    ##### Dane kursów jako DataFrame (odczyt przez pamięć podręczną; wynik współdzielony - tylko do odczytu) #####
+    def get_data_frame(self, course_type: str, date_from: date, date_to: date, currencies: list, columns: list = None):
+        key = ("frame", course_type, date_from, date_to, tuple(currencies), tuple(columns or ()))
+        return self.get_or_load(key, lambda: self.storage.get_data_frame(course_type, date_from, date_to, list(currencies), columns))
+
+    ##### Gotowe statystyki dzienne (odczyt przez pamięć podręczną; wynik współdzielony - tylko do odczytu) #####
+    def get_daily_stats(self, exchange_type: str, date_from: date, date_to: date, currencies: list):
+        key = ("stats", exchange_type, date_from, date_to, tuple(currencies))
+        return self.get_or_load(key, lambda: self.storage.get_daily_stats(exchange_type, date_from, date_to, list(currencies)))
@@ -1,75 +1,263 @@
 from datetime import date
-import pyodbc
+from typing import Iterator, List, Optional, Tuple
+import pandas as pd
 from models.tables import Tables
 from models.rates import Rates
+from services.db_pool import get_pool
+from services.storage_service import EXCHANGE_TYPES, STATS_COLUMNS, StorageService
+from utils.frames import frame_from_chunks
+from utils.metrics import instrument_methods
 
-class SqlService:
-    ##### Konstruktor inicjalizujący połączenie z bazą danych #####
-    def __init__(self, connection_string: str):
-        self.conn = pyodbc.connect(connection_string)
+##### Wyrażenia SQL kolumn zwracanych przez get_data_frame (kursy rzutowane na FLOAT) #####
+DATA_COLUMNS = {
+    "table": "t.[table]",
+    "no": "t.[no]",
+    "effectiveDate": "t.[effectiveDate]",
+    "tradingDate": "t.[tradingDate]",
+    "currency": "r.[currency]",
+    "code": "r.[code]",
+    "mid": "CAST(r.[mid] AS FLOAT)",
+    "bid": "CAST(r.[bid] AS FLOAT)",
+    "ask": "CAST(r.[ask] AS FLOAT)",
+}
+
+@instrument_methods("storage", StorageService.__abstractmethods__, backend="mssql")
+class SqlService(StorageService):
+    ##### Konstruktor korzystający ze współdzielonej w procesie puli połączeń z bazą danych #####
+    def __init__(self, connection_string: str, pool_size: int = 5, health_check_seconds: int = 30):
+        self.pool = get_pool(connection_string, pool_size, health_check_seconds)
+        self.lock_conn = None
+
+    ##### Tworzy serwis na podstawie sekcji "database" z appsettings.json #####
+    @classmethod
+    def from_settings(cls, settings: dict) -> "SqlService":
+        database = settings["database"]
+        return cls(database["connection_string"], database.get("pool_size", 5), database.get("health_check_seconds", 30))
     
     ##### Metoda wstawiająca wstawiająca rekord do tabeli NBP.Tables #####
     def insert_table(self, table: Tables) -> int:
-        cursor = self.conn.cursor()
-        cursor.execute("""INSERT INTO [NBP].[Tables] ([table], [no], [effectiveDate], [tradingDate])
-                          VALUES (?, ?, ?, ?)""", 
-            (table.table, table.no, table.effectiveDate, table.tradingDate))
-        self.conn.commit()
-
-        cursor.execute("SELECT @@IDENTITY AS ident")
-        row = cursor.fetchone()
-        return int(row.ident)
-    
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""INSERT INTO [NBP].[Tables] ([table], [no], [effectiveDate], [tradingDate])
+                              VALUES (?, ?, ?, ?)""", 
+                (table.table, table.no, table.effectiveDate, table.tradingDate))
+            conn.commit()
+
+            cursor.execute("SELECT @@IDENTITY AS ident")
+            row = cursor.fetchone()
+            cursor.execute("""INSERT INTO [NBP].[Changes] ([dateFrom]) VALUES (?)""", (table.effectiveDate,))
+            conn.commit()
+            return int(row.ident)
+
     ##### Metoda wstawiająca rekord do tabeli NBP.Rates #####
     def insert_rate(self, tableId: int, rate: Rates):
-        cursor = self.conn.cursor()
-        cursor.execute("""INSERT INTO [NBP].[Rates] ([tableId], [currency], [code], [bid], [ask], [mid])
-                            VALUES (?, ?, ?, ?, ?, ?)""", 
-            (tableId, rate.currency, rate.code, rate.bid, rate.ask, rate.mid))
-        self.conn.commit()
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""INSERT INTO [NBP].[Rates] ([tableId], [currency], [code], [bid], [ask], [mid])
+                                VALUES (?, ?, ?, ?, ?, ?)""", 
+                (tableId, rate.currency, rate.code, rate.bid, rate.ask, rate.mid))
+            cursor.execute("""INSERT INTO [NBP].[Changes] ([dateFrom])
+                              SELECT [effectiveDate] FROM [NBP].[Tables] WHERE [id] = ?""", (tableId,))
+            conn.commit()
 
-    ##### Metoda sprawdzająca istnienie rekordu w tabeli NBP.Tables #####
+    ##### Metoda wstawiająca/aktualizująca paczkę tabel wraz z kursami (jedna transakcja) #####
+    def bulk_upsert_tables(self, tables: List[Tables]) -> int:
+        # Ostatnie wystąpienie tabeli (table, no) i kursu (table, no, code) w paczce wygrywa
+        staged_tables = {(t.table, t.no): t for t in tables}
+        if not staged_tables:
+            return 0
+        staged_rates = {}
+        for t in staged_tables.values():
+            for r in t.rates:
+                staged_rates[(t.table, t.no, r.code)] = (t.table, t.no, r.currency, r.code, r.mid, r.bid, r.ask)
+
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.fast_executemany = True
+            try:
+                cursor.execute("""CREATE TABLE #StageTables(
+                                      [table] VARCHAR(1) NOT NULL,
+                                      [no] VARCHAR(20) NOT NULL,
+                                      [effectiveDate] DATETIME2 NOT NULL,
+                                      [tradingDate] DATETIME2 NULL);
+                                  CREATE TABLE #StageRates(
+                                      [table] VARCHAR(1) NOT NULL,
+                                      [no] VARCHAR(20) NOT NULL,
+                                      [currency] VARCHAR(80) NOT NULL,
+                                      [code] VARCHAR(3) NOT NULL,
+                                      [mid] DECIMAL(8,6) NULL,
+                                      [bid] DECIMAL(8,6) NULL,
+                                      [ask] DECIMAL(8,6) NULL);
+                                  CREATE TABLE #TableIds(
+                                      [id] INT NOT NULL,
+                                      [table] VARCHAR(1) NOT NULL,
+                                      [no] VARCHAR(20) NOT NULL);""")
+                cursor.executemany("""INSERT INTO #StageTables ([table], [no], [effectiveDate], [tradingDate])
+                                      VALUES (?, ?, ?, ?)""",
+                                   [(t.table, t.no, t.effectiveDate, t.tradingDate) for t in staged_tables.values()])
+                if staged_rates:
+                    cursor.executemany("""INSERT INTO #StageRates ([table], [no], [currency], [code], [mid], [bid], [ask])
+                                          VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                                       list(staged_rates.values()))
+
+                cursor.execute("""MERGE [NBP].[Tables] AS target
+                                  USING #StageTables AS source
+                                  ON target.[table] = source.[table] AND target.[no] = source.[no]
+                                  WHEN MATCHED THEN
+                                      UPDATE SET [effectiveDate] = source.[effectiveDate], [tradingDate] = source.[tradingDate]
+                                  WHEN NOT MATCHED THEN
+                                      INSERT ([table], [no], [effectiveDate], [tradingDate])
+                                      VALUES (source.[table], source.[no], source.[effectiveDate], source.[tradingDate])
+                                  OUTPUT inserted.[id], inserted.[table], inserted.[no] INTO #TableIds ([id], [table], [no]);""")
+                cursor.execute("""MERGE [NBP].[Rates] AS target
+                                  USING (SELECT i.[id] AS [tableId], s.[currency], s.[code], s.[mid], s.[bid], s.[ask]
+                                         FROM #StageRates s
+                                         JOIN #TableIds i ON i.[table] = s.[table] AND i.[no] = s.[no]) AS source
+                                  ON target.[tableId] = source.[tableId] AND target.[code] = source.[code]
+                                  WHEN MATCHED THEN
+                                      UPDATE SET [currency] = source.[currency], [mid] = source.[mid],
+                                                 [bid] = source.[bid], [ask] = source.[ask]
+                                  WHEN NOT MATCHED THEN
+                                      INSERT ([tableId], [currency], [code], [mid], [bid], [ask])
+                                      VALUES (source.[tableId], source.[currency], source.[code], source.[mid], source.[bid], source.[ask]);""")
+                # Wpis dziennika zmian - pamięci podręczne odświeżają dane od najwcześniejszej zmienionej daty (również poprawki kursów)
+                cursor.execute("""INSERT INTO [NBP].[Changes] ([dateFrom])
+                                  SELECT MIN([effectiveDate]) FROM #StageTables;""")
+                cursor.execute("DROP TABLE #StageTables; DROP TABLE #StageRates; DROP TABLE #TableIds;")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+            return len(staged_tables)
+
+    ##### Metoda sprawdzająca istnienie rekordu w tabeli NBP.Tables (klucz: table, no) #####
     def table_exists(self, table: Tables) -> bool:
-        cursor = self.conn.cursor()
-        cursor.execute("""SELECT 1
-                          FROM [NBP].[Tables] (NOLOCK)
-                          WHERE 1 = 1
-                          AND [table] = ? 
-                          AND [no] = ?
-                          AND [effectiveDate] = ?
-                          AND (([tradingDate] = ?) OR ([tradingDate] IS NULL AND ? IS NULL))""",
-                       (table.table, table.no, table.effectiveDate, table.tradingDate, table.tradingDate))
-        row = cursor.fetchone()
-        return row is not None
-    
-    ##### Metoda sprawdzająca istnienie rekordu w tabeli NBP.Rates #####
-    def rate_exists(self, rate: Rates) -> bool:
-        cursor = self.conn.cursor()
-        cursor.execute("""SELECT 1
-                          FROM [NBP].[Rates] (NOLOCK)
-                          WHERE 1 = 1
-                          AND [currency] = ? 
-                          AND [code] = ?
-                          AND (([bid] = ?) OR ([bid] IS NULL AND ? IS NULL))
-                          AND (([ask] = ?) OR ([ask] IS NULL AND ? IS NULL))
-                          AND (([mid] = ?) OR ([mid] IS NULL AND ? IS NULL))""",
-                       (rate.currency, rate.code, rate.bid, rate.bid, rate.ask, rate.ask, rate.mid, rate.mid))
-        row = cursor.fetchone()
-        return row is not None
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""SELECT 1
+                              FROM [NBP].[Tables] (NOLOCK)
+                              WHERE [table] = ?
+                              AND [no] = ?""",
+                           (table.table, table.no))
+            row = cursor.fetchone()
+            return row is not None
+
+    ##### Metoda sprawdzająca istnienie rekordu w tabeli NBP.Rates (klucz: tableId, code) #####
+    def rate_exists(self, tableId: int, rate: Rates) -> bool:
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""SELECT 1
+                              FROM [NBP].[Rates] (NOLOCK)
+                              WHERE [tableId] = ?
+                              AND [code] = ?""",
+                           (tableId, rate.code))
+            row = cursor.fetchone()
+            return row is not None
 
     ##### Metoda pobierająca datę ostatniego rekordu dla danego typu tabeli #####
-    def get_last_date(self, table_char: str) -> date:
-        cursor = self.conn.cursor()
-        cursor.execute("""SELECT MAX([effectiveDate]) AS lastDate
-                          FROM [NBP].[Tables] (NOLOCK)
-                          WHERE [table] = ?""",
-                       (table_char))
-        row = cursor.fetchone()
-        if row and row.lastDate:
-            return row.lastDate
-        else:
-            return date(2025, 10, 1)
-    
+    def get_last_date(self, table_char: str) -> Optional[date]:
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""SELECT MAX([effectiveDate]) AS lastDate
+                              FROM [NBP].[Tables] (NOLOCK)
+                              WHERE [table] = ?""",
+                           (table_char))
+            row = cursor.fetchone()
+            if row and row.lastDate:
+                return row.lastDate
+            else:
+                return None
+
+    ##### Metoda pobierająca znacznik ostatniej synchronizacji dla danego typu tabeli #####
+    def get_watermark(self, table_char: str) -> Optional[date]:
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""SELECT [lastDate]
+                              FROM [NBP].[SyncState] (NOLOCK)
+                              WHERE [table] = ?""",
+                           (table_char))
+            row = cursor.fetchone()
+            cursor.close()
+            return row.lastDate if row else None
+
+    ##### Metoda zapisująca znacznik ostatniej synchronizacji dla danego typu tabeli #####
+    def set_watermark(self, table_char: str, last_date: date):
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""MERGE [NBP].[SyncState] AS target
+                              USING (SELECT ? AS [table], ? AS [lastDate]) AS source
+                              ON target.[table] = source.[table]
+                              WHEN MATCHED THEN
+                                  UPDATE SET [lastDate] = source.[lastDate], [updatedAt] = SYSUTCDATETIME()
+                              WHEN NOT MATCHED THEN
+                                  INSERT ([table], [lastDate], [updatedAt])
+                                  VALUES (source.[table], source.[lastDate], SYSUTCDATETIME());""",
+                           (table_char, last_date))
+            conn.commit()
+            cursor.close()
+
+    ##### Metoda zakładająca blokadę synchronizacji (sp_getapplock) na czas sesji osobnego połączenia #####
+    def acquire_sync_lock(self, resource: str = "NBP.Sync") -> bool:
+        conn = self.pool.acquire()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""SET NOCOUNT ON;
+                              DECLARE @result INT;
+                              EXEC @result = sp_getapplock @Resource = ?, @LockMode = 'Exclusive',
+                                                           @LockOwner = 'Session', @LockTimeout = 0;
+                              SELECT @result AS result;""",
+                           (resource))
+            row = cursor.fetchone()
+            cursor.close()
+        except Exception:
+            self.pool.release(conn, broken=True)
+            raise
+        if row is None or row.result < 0:
+            self.pool.release(conn)
+            return False
+        self.lock_conn = conn
+        return True
+
+    ##### Metoda zwalniająca blokadę synchronizacji i oddająca połączenie do puli #####
+    def release_sync_lock(self, resource: str = "NBP.Sync"):
+        conn, self.lock_conn = self.lock_conn, None
+        if conn is None:
+            return
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""EXEC sp_releaseapplock @Resource = ?, @LockOwner = 'Session'""",
+                           (resource))
+            cursor.close()
+        except Exception:
+            # Zamknięcie sesji zwalnia blokadę
+            self.pool.release(conn, broken=True)
+            raise
+        self.pool.release(conn)
+
+    ##### Metoda zwracająca wersję danych (data ostatniej wczytanej tabeli, liczba tabel, numer ostatniej zmiany) #####
+    def get_data_version(self) -> Tuple[Optional[date], int, int]:
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""SELECT MAX([effectiveDate]) AS lastDate, COUNT(*) AS tablesCount,
+                                     (SELECT ISNULL(MAX([generation]), 0) FROM [NBP].[Changes] (NOLOCK)) AS generation
+                              FROM [NBP].[Tables] (NOLOCK)""")
+            row = cursor.fetchone()
+            cursor.close()
+            return (row.lastDate, row.tablesCount, row.generation) if row else (None, 0, 0)
+
+    ##### Metoda zwracająca najwcześniejszą datę notowania zmienioną po zmianie o podanym numerze #####
+    def get_changed_from(self, generation: int) -> Optional[date]:
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""SELECT MIN([dateFrom]) AS dateFrom
+                              FROM [NBP].[Changes] (NOLOCK)
+                              WHERE [generation] > ?""", [generation])
+            row = cursor.fetchone()
+            cursor.close()
+            return row.dateFrom if row else None
+
     ##### Metoda pobierająca dane z bazy dla danego zakresu dat i typu tabeli #####
     def get_data(self, course_type: str, date_from: date, date_to: date, currencies: list) -> list:
         currency_list_params = ",".join("?" * len(currencies))
@@ -78,37 +266,191 @@ class SqlService:
         if course_type is not None and course_type != "":
             filter_clause = f"AND r.[{course_type}] IS NOT NULL"
 
-        cursor = self.conn.cursor()
-        cursor.execute(f"""
-            SELECT t.[table], 
-                   t.[no], 
-                   t.[effectiveDate],
-                   t.[tradingDate],
-                   r.[currency],
-                   r.[code],
-                   r.[mid],
-                   r.[bid],
-                   r.[ask]
-            FROM [NBP].[Rates] r (NOLOCK)
-            JOIN [NBP].[Tables] t (NOLOCK) ON r.[tableId] = t.[id]
-            WHERE 1 = 1
-            AND t.[effectiveDate] BETWEEN ? AND ?
-            AND r.[code] IN ({currency_list_params})
-            {filter_clause}
-            ORDER BY r.[code], t.[effectiveDate]
-        """, params)
-        rows = [tuple(row) for row in cursor.fetchall()]
-        cursor.close()
-        return rows
-    
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT t.[table], 
+                       t.[no], 
+                       t.[effectiveDate],
+                       t.[tradingDate],
+                       r.[currency],
+                       r.[code],
+                       r.[mid],
+                       r.[bid],
+                       r.[ask]
+                FROM [NBP].[Rates] r (NOLOCK)
+                JOIN [NBP].[Tables] t (NOLOCK) ON r.[tableId] = t.[id]
+                WHERE 1 = 1
+                AND t.[effectiveDate] BETWEEN ? AND ?
+                AND r.[code] IN ({currency_list_params})
+                {filter_clause}
+                ORDER BY r.[code], t.[effectiveDate]
+            """, params)
+            rows = [tuple(row) for row in cursor.fetchall()]
+            cursor.close()
+            return rows
+
+    ##### Zapytanie o kursy (wskazane kolumny, kolejność: code, effectiveDate) wraz z parametrami #####
+    def data_query(self, course_type: str, date_from: date, date_to: date, currencies: list, columns: List[str]):
+        unknown = [column for column in columns if column not in DATA_COLUMNS]
+        if unknown:
+            raise ValueError(f"Nieznane kolumny: {unknown}")
+        currency_list_params = ",".join("?" * len(currencies))
+        params = [date_from, date_to] + list(currencies)
+        filter_clause = ""
+        if course_type is not None and course_type != "":
+            filter_clause = f"AND r.[{course_type}] IS NOT NULL"
+        select_clause = ", ".join(f"{DATA_COLUMNS[column]} AS [{column}]" for column in columns)
+        return f"""
+                SELECT {select_clause}
+                FROM [NBP].[Rates] r (NOLOCK)
+                JOIN [NBP].[Tables] t (NOLOCK) ON r.[tableId] = t.[id]
+                WHERE 1 = 1
+                AND t.[effectiveDate] BETWEEN ? AND ?
+                AND r.[code] IN ({currency_list_params})
+                {filter_clause}
+                ORDER BY r.[code], t.[effectiveDate]
+            """, params
+
+    ##### Metoda pobierająca dane jako DataFrame (paczki fetchmany, typowane kolumny, tylko wskazane kolumny) #####
+    def get_data_frame(self, course_type: str, date_from: date, date_to: date, currencies: list,
+                       columns: List[str] = None, chunk_size: int = 50000) -> pd.DataFrame:
+        columns = list(columns or DATA_COLUMNS)
+        sql, params = self.data_query(course_type, date_from, date_to, currencies, columns)
+
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            df = frame_from_chunks(iter(lambda: cursor.fetchmany(chunk_size), []), columns)
+            cursor.close()
+            return df
+
+    ##### Metoda zwracająca dane jako kolejne paczki DataFrame (wynik odczytywany z serwera strumieniowo przez fetchmany) #####
+    def iter_data_chunks(self, course_type: str, date_from: date, date_to: date, currencies: list,
+                         columns: List[str] = None, chunk_size: int = 50000) -> Iterator[pd.DataFrame]:
+        columns = list(columns or DATA_COLUMNS)
+        sql, params = self.data_query(course_type, date_from, date_to, currencies, columns)
+
+        # Połączenie pozostaje pobrane z puli do momentu odczytania (lub porzucenia) ostatniej paczki
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(sql, params)
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    yield frame_from_chunks([rows], columns)
+            finally:
+                cursor.close()
+
+    ##### Metoda pobierająca kursy od daty `since` wraz z `tail` poprzednimi notowaniami każdej waluty #####
+    def get_stats_source(self, exchange_type: str, since: Optional[date], tail: int) -> pd.DataFrame:
+        if exchange_type not in EXCHANGE_TYPES:
+            raise ValueError(f"Nieznany typ kursu: {exchange_type}")
+        columns = ["code", "effectiveDate", "value"]
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            if since is None:
+                cursor.execute(f"""
+                    SELECT r.[code], t.[effectiveDate], CAST(r.[{exchange_type}] AS FLOAT) AS [value]
+                    FROM [NBP].[Rates] r (NOLOCK)
+                    JOIN [NBP].[Tables] t (NOLOCK) ON r.[tableId] = t.[id]
+                    WHERE r.[{exchange_type}] IS NOT NULL
+                    ORDER BY r.[code], t.[effectiveDate]
+                """)
+            else:
+                # Okno poprzedzające ograniczone datą (tabela B - notowania tygodniowe), aby nie skanować całej historii
+                lookback_days = (tail + 2) * 7
+                cursor.execute(f"""
+                    SELECT [code], [effectiveDate], [value]
+                    FROM (
+                        SELECT r.[code], t.[effectiveDate], CAST(r.[{exchange_type}] AS FLOAT) AS [value],
+                               ROW_NUMBER() OVER (PARTITION BY r.[code], CASE WHEN t.[effectiveDate] >= ? THEN 1 ELSE 0 END
+                                                  ORDER BY t.[effectiveDate] DESC) AS [rn],
+                               CASE WHEN t.[effectiveDate] >= ? THEN 1 ELSE 0 END AS [isNew]
+                        FROM [NBP].[Rates] r (NOLOCK)
+                        JOIN [NBP].[Tables] t (NOLOCK) ON r.[tableId] = t.[id]
+                        WHERE r.[{exchange_type}] IS NOT NULL
+                        AND t.[effectiveDate] >= DATEADD(DAY, -?, ?)
+                    ) s
+                    WHERE [isNew] = 1 OR [rn] <= ?
+                    ORDER BY [code], [effectiveDate]
+                """, (since, since, lookback_days, since, tail))
+            df = frame_from_chunks(iter(lambda: cursor.fetchmany(50000), []), columns)
+            cursor.close()
+            return df
+
+    ##### Metoda zapisująca (MERGE) statystyki dzienne jednego typu kursu w jednej transakcji #####
+    def upsert_daily_stats(self, exchange_type: str, stats: pd.DataFrame) -> int:
+        if stats.empty:
+            return 0
+        clean = stats[STATS_COLUMNS].astype(object).where(stats[STATS_COLUMNS].notna(), None)
+        rows = [(exchange_type, code, effective_date.to_pydatetime(), value, change, mean, std)
+                for effective_date, code, value, change, mean, std in clean.itertuples(index=False, name=None)]
+
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.fast_executemany = True
+            try:
+                cursor.execute("""CREATE TABLE #StageStats(
+                                      [exchangeType] VARCHAR(3) NOT NULL,
+                                      [code] VARCHAR(3) NOT NULL,
+                                      [effectiveDate] DATETIME2 NOT NULL,
+                                      [value] FLOAT NOT NULL,
+                                      [changePct] FLOAT NULL,
+                                      [rollingMean] FLOAT NULL,
+                                      [rollingStd] FLOAT NULL);""")
+                cursor.executemany("""INSERT INTO #StageStats ([exchangeType], [code], [effectiveDate], [value],
+                                                              [changePct], [rollingMean], [rollingStd])
+                                      VALUES (?, ?, ?, ?, ?, ?, ?)""", rows)
+                cursor.execute("""MERGE [NBP].[DailyStats] AS target
+                                  USING #StageStats AS source
+                                  ON target.[exchangeType] = source.[exchangeType]
+                                  AND target.[code] = source.[code]
+                                  AND target.[effectiveDate] = source.[effectiveDate]
+                                  WHEN MATCHED THEN
+                                      UPDATE SET [value] = source.[value], [changePct] = source.[changePct],
+                                                 [rollingMean] = source.[rollingMean], [rollingStd] = source.[rollingStd]
+                                  WHEN NOT MATCHED THEN
+                                      INSERT ([exchangeType], [code], [effectiveDate], [value], [changePct], [rollingMean], [rollingStd])
+                                      VALUES (source.[exchangeType], source.[code], source.[effectiveDate], source.[value],
+                                              source.[changePct], source.[rollingMean], source.[rollingStd]);""")
+                cursor.execute("DROP TABLE #StageStats;")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+        return len(rows)
+
+    ##### Metoda pobierająca gotowe statystyki dzienne dla zakresu dat i walut #####
+    def get_daily_stats(self, exchange_type: str, date_from: date, date_to: date, currencies: list) -> pd.DataFrame:
+        currency_list_params = ",".join("?" * len(currencies))
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT [effectiveDate], [code], [value], [changePct], [rollingMean], [rollingStd]
+                FROM [NBP].[DailyStats] (NOLOCK)
+                WHERE [exchangeType] = ?
+                AND [effectiveDate] BETWEEN ? AND ?
+                AND [code] IN ({currency_list_params})
+                ORDER BY [code], [effectiveDate]
+            """, [exchange_type, date_from, date_to] + list(currencies))
+            df = frame_from_chunks(iter(lambda: cursor.fetchmany(50000), []), STATS_COLUMNS)
+            cursor.close()
+            return df
+
     ##### Metoda pobierająca listę unikalnych walut z tabeli NBP.Rates #####
     def get_currencies(self) -> list:
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT DISTINCT r.[code]
-            FROM [NBP].[Rates] r (NOLOCK)
-            ORDER BY r.[code]
-        """)
-        rows = [row.code for row in cursor.fetchall()]
-        cursor.close()
-        return rows
\ No newline at end of file
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT DISTINCT r.[code]
+                FROM [NBP].[Rates] r (NOLOCK)
+                ORDER BY r.[code]
+            """)
+            rows = [row.code for row in cursor.fetchall()]
+            cursor.close()
+            return rows
\ No newline at end of file
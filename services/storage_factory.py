@@ -0,0 +1,13 @@
+from services.storage_service import StorageService
+
+##### Tworzy magazyn danych wskazany w appsettings.json (database.backend: mssql / embedded) #####
+def create_storage(settings: dict) -> StorageService:
+    backend = settings["database"].get("backend", "mssql")
+    # Import wewnątrz gałęzi - pyodbc i duckdb są wymagane tylko przez wybrany magazyn
+    if backend == "mssql":
+        from services.sql_service import SqlService
+        return SqlService.from_settings(settings)
+    if backend == "embedded":
+        from services.embedded_service import EmbeddedService
+        return EmbeddedService.from_settings(settings)
+    raise ValueError(f"Nieznany magazyn danych: {backend}")
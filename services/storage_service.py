@@ -0,0 +1,94 @@
+from abc import ABC, abstractmethod
+from datetime import date
+from typing import Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from models.rates import Rates
+from models.tables import Tables
+
+##### Kolumny wyników zapytań o kursy (kolejność jak w get_data) #####
+DATA_COLUMN_NAMES = ["table", "no", "effectiveDate", "tradingDate", "currency", "code", "mid", "bid", "ask"]
+EXCHANGE_TYPES = ("mid", "bid", "ask")
+STATS_COLUMNS = ["effectiveDate", "code", "value", "changePct", "rollingMean", "rollingStd"]
+
+class StorageService(ABC):
+    ##### Interfejs magazynu danych kursów (SQL Server, wbudowane SQLite/DuckDB) #####
+
+    ##### Wstawia rekord do tabeli tabel kursów i zwraca jego id #####
+    @abstractmethod
+    def insert_table(self, table: Tables) -> int: ...
+
+    ##### Wstawia rekord kursu dla tabeli o podanym id #####
+    @abstractmethod
+    def insert_rate(self, tableId: int, rate: Rates): ...
+
+    ##### Wstawia/aktualizuje paczkę tabel wraz z kursami w jednej transakcji #####
+    @abstractmethod
+    def bulk_upsert_tables(self, tables: List[Tables]) -> int: ...
+
+    ##### Sprawdza istnienie tabeli (klucz: table, no) #####
+    @abstractmethod
+    def table_exists(self, table: Tables) -> bool: ...
+
+    ##### Sprawdza istnienie kursu (klucz: tableId, code) #####
+    @abstractmethod
+    def rate_exists(self, tableId: int, rate: Rates) -> bool: ...
+
+    ##### Data ostatniej tabeli danego typu (None, gdy brak danych) #####
+    @abstractmethod
+    def get_last_date(self, table_char: str) -> Optional[date]: ...
+
+    ##### Znacznik ostatniej synchronizacji danego typu tabeli #####
+    @abstractmethod
+    def get_watermark(self, table_char: str) -> Optional[date]: ...
+
+    ##### Zapis znacznika ostatniej synchronizacji #####
+    @abstractmethod
+    def set_watermark(self, table_char: str, last_date: date): ...
+
+    ##### Blokada synchronizacji pomiędzy procesami (False, gdy zajęta) #####
+    @abstractmethod
+    def acquire_sync_lock(self, resource: str = "NBP.Sync") -> bool: ...
+
+    ##### Zwolnienie blokady synchronizacji #####
+    @abstractmethod
+    def release_sync_lock(self, resource: str = "NBP.Sync"): ...
+
+    ##### Wersja danych (data ostatniej wczytanej tabeli, liczba tabel, numer ostatniej zmiany danych) #####
+    @abstractmethod
+    def get_data_version(self) -> Tuple[Optional[date], int, int]: ...
+
+    ##### Najwcześniejsza data notowania zmieniona po zmianie nr `generation` (None - brak zmian) #####
+    @abstractmethod
+    def get_changed_from(self, generation: int) -> Optional[date]: ...
+
+    ##### Dane kursów jako lista krotek (kolumny DATA_COLUMN_NAMES) #####
+    @abstractmethod
+    def get_data(self, course_type: str, date_from: date, date_to: date, currencies: list) -> list: ...
+
+    ##### Dane kursów jako DataFrame z typowanymi kolumnami #####
+    @abstractmethod
+    def get_data_frame(self, course_type: str, date_from: date, date_to: date, currencies: list,
+                       columns: List[str] = None, chunk_size: int = 50000) -> pd.DataFrame: ...
+
+    ##### Dane kursów jako kolejne paczki DataFrame (kursor strumieniowy - stałe zużycie pamięci) #####
+    @abstractmethod
+    def iter_data_chunks(self, course_type: str, date_from: date, date_to: date, currencies: list,
+                         columns: List[str] = None, chunk_size: int = 50000) -> Iterator[pd.DataFrame]: ...
+
+    ##### Kursy od daty `since` wraz z `tail` poprzednimi notowaniami każdej waluty #####
+    @abstractmethod
+    def get_stats_source(self, exchange_type: str, since: Optional[date], tail: int) -> pd.DataFrame: ...
+
+    ##### Zapis statystyk dziennych jednego typu kursu #####
+    @abstractmethod
+    def upsert_daily_stats(self, exchange_type: str, stats: pd.DataFrame) -> int: ...
+
+    ##### Gotowe statystyki dzienne dla zakresu dat i walut #####
+    @abstractmethod
+    def get_daily_stats(self, exchange_type: str, date_from: date, date_to: date, currencies: list) -> pd.DataFrame: ...
+
+    ##### Lista unikalnych kodów walut #####
+    @abstractmethod
+    def get_currencies(self) -> list: ...
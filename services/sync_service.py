@@ -0,0 +1,120 @@
+import threading
+from datetime import date, datetime, timedelta
+from logging import Logger
+from typing import List
+
+from models.tables import Tables
+from services.aggregate_service import AggregateService, aggregates_enabled
+from services.api_service import ApiService
+from services.ingest_pipeline import IngestPipeline
+from services.storage_factory import create_storage
+from utils.metrics import increment, registry
+
+class SyncService:
+    ##### Konstruktor serwisu synchronizacji danych NBP z bazą danych #####
+    def __init__(self, settings: dict, logger: Logger, offline: bool = None):
+        self.settings = settings
+        self.logger = logger
+        self.tables = settings.get("tables", ["A", "B", "C"])
+        self.start_date = date.fromisoformat(settings.get("sync", {}).get("start_date", "2025-10-01"))
+        self.batch_size = settings.get("sync", {}).get("batch_size", 100)
+        self.queue_size = settings.get("sync", {}).get("queue_size", 4)
+        self.pipeline_metrics = {}
+        self.storage = create_storage(settings)
+        aggregates = settings.get("aggregates", {})
+        self.aggregate_service = None
+        if aggregates_enabled(settings):
+            self.aggregate_service = AggregateService(self.storage, logger, settings.get("exchanges", ["mid", "bid", "ask"]),
+                                                      aggregates.get("window", 7))
+        self.api_service = ApiService.from_settings(settings, offline)
+
+    ##### Metoda wyznaczająca pierwszy brakujący dzień dla danego typu tabeli #####
+    def get_start_date(self, table_char: str) -> date:
+        watermark = self.storage.get_watermark(table_char)
+        if watermark is None:
+            last_date = self.storage.get_last_date(table_char)
+            if last_date is None:
+                return self.start_date
+            watermark = last_date
+        if isinstance(watermark, datetime):
+            watermark = watermark.date()
+        return watermark + timedelta(days=1)
+
+    ##### Metoda zapisująca pobrane tabele jednego typu i przesuwająca znacznik synchronizacji #####
+    def load_tables(self, table_char: str, tables: List[Tables], date_from: date, date_to: date) -> int:
+        inserted = 0
+        for i in range(0, len(tables), self.batch_size):
+            inserted += self.storage.bulk_upsert_tables(tables[i:i + self.batch_size])
+        increment("sync.tables", len(tables), table=table_char)
+        increment("sync.rows_ingested", sum(len(table.rates) for table in tables), table=table_char)
+
+        # Dzisiejsza tabela może zostać opublikowana później - znacznik nie wyprzedza ostatniej pobranej tabeli
+        watermark = date_to if date_to < date.today() else date_to - timedelta(days=1)
+        if tables:
+            watermark = max(watermark, max(table.effectiveDate for table in tables).date())
+        if tables and self.aggregate_service is not None:
+            self.aggregate_service.refresh(min(table.effectiveDate for table in tables),
+                                           AggregateService.exchanges_for_table(table_char))
+        self.storage.set_watermark(table_char, watermark)
+
+        if tables:
+            self.logger.info(f"Pobrano {len(tables)} tabeli {table_char} z API (od {date_from} do {date_to}), zapisano {inserted}.")
+        return inserted
+
+    ##### Metoda synchronizująca przyrostowo wskazane typy tabel (potok: pobieranie, parsowanie i zapis okien równolegle) #####
+    def sync_tables(self, table_chars: List[str]) -> int:
+        date_to = date.today()
+        ranges = {}
+        for table_char in table_chars:
+            date_from = self.get_start_date(table_char)
+            if date_from <= date_to:
+                ranges[table_char] = (date_from, date_to)
+        if not ranges:
+            return 0
+
+        pipeline = IngestPipeline(self.api_service, self.logger, self.load_tables,
+                                  self.api_service.max_workers, self.queue_size)
+        inserted = pipeline.run(ranges)
+        self.pipeline_metrics = pipeline.get_metrics()
+        return inserted
+
+    ##### Metoda synchronizująca przyrostowo jeden typ tabeli (A, B, C) #####
+    def sync_table(self, table_char: str) -> int:
+        return self.sync_tables([table_char])
+
+    ##### Metoda synchronizująca wszystkie typy tabel pod blokadą #####
+    def sync_all(self) -> bool:
+        if not self.storage.acquire_sync_lock():
+            self.logger.info("Synchronizacja jest już wykonywana przez inny proces - pominięto.")
+            return False
+        try:
+            with registry.profiled("sync"), registry.timed("sync.sync_all"):
+                self.sync_tables(self.tables)
+        finally:
+            self.storage.release_sync_lock()
+        registry.write()
+        for stage, stage_metrics in self.pipeline_metrics.items():
+            self.logger.info(f"Potok synchronizacji - etap {stage}: okna {stage_metrics['windows']}, tabele {stage_metrics['tables']}, "
+                             f"praca {stage_metrics['busy_seconds']:.2f} s, oczekiwanie na kolejkę {stage_metrics['blocked_seconds']:.2f} s.")
+        metrics = self.api_service.http_client.get_metrics()
+        self.logger.info(f"Metryki HTTP NBP: zapytania {metrics['requests']}, 304 {metrics['not_modified']}, "
+                         f"błędy {metrics['errors']}, bajty {metrics['bytes']}, średni czas {metrics['avg_latency_seconds']:.3f} s.")
+        if self.api_service.cache is not None:
+            self.logger.info(f"Pamięć podręczna API NBP: trafienia {self.api_service.cache.hits}, chybienia {self.api_service.cache.misses}.")
+        return True
+
+    ##### Metoda uruchamiająca cykliczną synchronizację do momentu zatrzymania #####
+    def run_forever(self, interval_seconds: int, stop_event: threading.Event = None):
+        stop_event = stop_event or threading.Event()
+        while not stop_event.is_set():
+            try:
+                self.sync_all()
+            except Exception as ex:
+                self.logger.exception(f"Błąd podczas synchronizacji danych: {ex}")
+            stop_event.wait(interval_seconds)
+
+    ##### Metoda uruchamiająca synchronizację w wątku działającym w tle #####
+    def start_background(self, interval_seconds: int) -> threading.Thread:
+        thread = threading.Thread(target=self.run_forever, args=(interval_seconds,), name="nbp-sync", daemon=True)
+        thread.start()
+        return thread
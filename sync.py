@@ -0,0 +1,47 @@
+import argparse
+
+from config.init_settings import init_settings
+from services.sync_service import SyncService
+from utils.logger import init_logger
+from utils.metrics import registry
+
+def main():
+    logger = init_logger()
+    settings = init_settings()
+    registry.configure(settings)
+    sync_settings = settings.get("sync", {})
+
+    parser = argparse.ArgumentParser(description="Synchronizacja kursów walut NBP z bazą danych.")
+    parser.add_argument("--once", action="store_true", help="Jednorazowa synchronizacja i zakończenie działania.")
+    parser.add_argument("--interval", type=int, default=sync_settings.get("interval_seconds", 900),
+                        help="Odstęp pomiędzy synchronizacjami w sekundach.")
+    parser.add_argument("--offline", action="store_true", default=None,
+                        help="Tryb offline - dane wyłącznie z pamięci podręcznej odpowiedzi API NBP.")
+    parser.add_argument("--rebuild-aggregates", action="store_true",
+                        help="Przeliczenie statystyk dziennych (NBP.DailyStats) dla całej historii.")
+    args = parser.parse_args()
+
+    sync_service = SyncService(settings, logger, args.offline)
+    if args.rebuild_aggregates:
+        if sync_service.aggregate_service is None:
+            logger.warning("Statystyki dzienne są wyłączone (aggregates.enabled lub włączona pamięć podręczna wykresów plot_cache.enabled).")
+            return
+        logger.info("Rozpoczęcie przeliczania statystyk dziennych.")
+        sync_service.aggregate_service.refresh()
+        logger.info("Zakończenie przeliczania statystyk dziennych.")
+        return
+
+    if args.once:
+        logger.info("Rozpoczęcie jednorazowej synchronizacji danych NBP.")
+        sync_service.sync_all()
+        logger.info("Zakończenie synchronizacji danych NBP.")
+        return
+
+    logger.info(f"Rozpoczęcie cyklicznej synchronizacji danych NBP (co {args.interval} s).")
+    try:
+        sync_service.run_forever(args.interval)
+    except KeyboardInterrupt:
+        logger.info("Zatrzymano synchronizację danych NBP.")
+
+if __name__ == "__main__":
+    main()
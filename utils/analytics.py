@@ -0,0 +1,106 @@
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+class RateMatrix:
+    ##### Kursy posortowane po (walucie, dacie) jako tablice NumPy; obliczenia wektorowe w obrębie walut #####
+    def __init__(self, labels: np.ndarray, group: np.ndarray, dates: np.ndarray, values: np.ndarray, order: np.ndarray = None):
+        self.labels = labels
+        self.group = group
+        self.dates = dates
+        self.values = values
+        self.order = order
+        boundaries = np.flatnonzero(np.diff(group)) + 1
+        self.starts = np.concatenate(([0], boundaries)).astype(np.intp)
+        self.positions = np.arange(len(values)) - self.starts[group] if len(values) else np.empty(0, dtype=np.intp)
+        self._pivot = None
+
+    ##### Tworzy macierz z DataFrame (kolumny: code, effectiveDate, kurs) #####
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, value_column: str) -> "RateMatrix":
+        group, labels = pd.factorize(df["code"], sort=True)
+        labels = np.asarray(labels, dtype=object).astype(str)
+        dates = df["effectiveDate"].to_numpy(dtype="datetime64[ns]")
+        # Dane z bazy są już posortowane (ORDER BY code, effectiveDate) - sortowanie tylko w razie potrzeby
+        same_group = group[1:] == group[:-1]
+        if np.all(group[1:] >= group[:-1]) and np.all(dates[1:][same_group] >= dates[:-1][same_group]):
+            order = np.arange(len(group))
+        else:
+            order = np.lexsort((dates, group))
+        values = df[value_column].to_numpy(dtype=np.float64)
+        return cls(labels, group[order], dates[order], values[order], order)
+
+    ##### Dzienna zmiana względna (jak pct_change w obrębie waluty) #####
+    def pct_change(self) -> np.ndarray:
+        change = np.full(self.values.shape, np.nan)
+        change[1:] = self.values[1:] / self.values[:-1] - 1
+        change[self.positions == 0] = np.nan
+        return change
+
+    ##### Średnia krocząca z okna `window` kolejnych notowań waluty #####
+    def rolling_mean(self, window: int, values: np.ndarray = None) -> np.ndarray:
+        return self._rolling(self.values if values is None else values, window, lambda w: w.mean(axis=1))
+
+    ##### Odchylenie standardowe (ddof=1) z okna `window` kolejnych notowań waluty #####
+    def rolling_std(self, window: int, values: np.ndarray = None) -> np.ndarray:
+        return self._rolling(self.values if values is None else values, window, lambda w: w.std(axis=1, ddof=1))
+
+    ##### Wskaźnik siły waluty: kurs względem pierwszego notowania w zakresie (100 = start) #####
+    def strength(self) -> np.ndarray:
+        return self.values / self.values[self.starts[self.group]] * 100
+
+    ##### Maskuje `leading` pierwszych notowań każdej waluty (statystyki wyliczone z historią sprzed zakresu dat) #####
+    def mask_leading(self, values: np.ndarray, leading: int) -> np.ndarray:
+        return np.where(self.positions < leading, np.nan, values)
+
+    ##### Macierz data × waluta (wyliczana jednokrotnie) #####
+    def pivot(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self._pivot is None:
+            unique_dates, date_index = np.unique(self.dates, return_inverse=True)
+            matrix = np.full((len(unique_dates), len(self.labels)), np.nan)
+            matrix[date_index, self.group] = self.values
+            self._pivot = (unique_dates, matrix)
+        return self._pivot
+
+    ##### Relacja dwóch walut w dniach notowanych dla obu #####
+    def ratio(self, first: str, second: str) -> pd.DataFrame:
+        dates, matrix = self.pivot()
+        a = matrix[:, self._column(first)]
+        b = matrix[:, self._column(second)]
+        mask = ~(np.isnan(a) | np.isnan(b))
+        return pd.DataFrame({first: a[mask], second: b[mask], "ratio": a[mask] / b[mask]},
+                            index=pd.DatetimeIndex(dates[mask], name="effectiveDate"))
+
+    ##### Macierz korelacji Pearsona (pary obserwacji kompletnych, jak DataFrame.corr) #####
+    def correlation(self) -> pd.DataFrame:
+        _, matrix = self.pivot()
+        present = (~np.isnan(matrix)).astype(np.float64)
+        # Centrowanie kolumn poprawia stabilność numeryczną sum iloczynów
+        x = np.nan_to_num(matrix - np.nanmean(matrix, axis=0))
+        n = present.T @ present
+        sum_x = x.T @ present
+        sum_xx = (x * x).T @ present
+        sum_xy = x.T @ x
+        with np.errstate(divide="ignore", invalid="ignore"):
+            numerator = n * sum_xy - sum_x * sum_x.T
+            denominator = np.sqrt((n * sum_xx - sum_x ** 2) * (n * sum_xx.T - sum_x.T ** 2))
+            corr = np.clip(numerator / denominator, -1.0, 1.0)
+        corr[n < 2] = np.nan
+        return pd.DataFrame(corr, index=pd.Index(self.labels, name="code"), columns=pd.Index(self.labels, name="code"))
+
+    ##### Kolumna macierzy dla kodu waluty #####
+    def _column(self, code: str) -> int:
+        index = np.searchsorted(self.labels, code)
+        if index >= len(self.labels) or self.labels[index] != code:
+            raise KeyError(code)
+        return index
+
+    ##### Okno kroczące na tablicy długiej; okna przekraczające granicę waluty są odrzucane #####
+    def _rolling(self, values: np.ndarray, window: int, reduce) -> np.ndarray:
+        result = np.full(values.shape, np.nan)
+        if window > 0 and len(values) >= window:
+            result[window - 1:] = reduce(sliding_window_view(values, window))
+        result[self.positions < window - 1] = np.nan
+        return result
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+##### Redukcja liczby punktów serii przed przekazaniem do wykresu (agregacja tygodniowa/miesięczna lub LTTB) #####
+
+##### Indeksy punktów wybranych algorytmem Largest-Triangle-Three-Buckets (pierwszy i ostatni punkt zachowane) #####
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # Granice koszyków dla punktów wewnętrznych (1 .. n-2) oraz średnie koszyków
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.intp)
+    counts = np.diff(edges)
+    mean_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / counts
+    mean_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / counts
+
+    selected = np.empty(threshold, dtype=np.intp)
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        # Trzeci wierzchołek trójkąta: średnia kolejnego koszyka (dla ostatniego - ostatni punkt)
+        if bucket + 1 < threshold - 2:
+            next_x, next_y = mean_x[bucket + 1], mean_y[bucket + 1]
+        else:
+            next_x, next_y = x[n - 1], y[n - 1]
+        area = np.abs((x[previous] - next_x) * (y[start:end] - y[previous])
+                      - (x[previous] - x[start:end]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    return selected
+
+##### Przybliżona liczba dni w koszyku danej częstotliwości #####
+BUCKET_DAYS = {"D": 1, "W": 7, "M": 30.44, "Q": 91.31, "Y": 365.25}
+
+##### Najdrobniejsza częstotliwość koszyków ("D" - bez agregacji) mieszcząca zakres w limicie punktów serii #####
+def bucket_frequency(days: int, max_points: int) -> str:
+    for frequency, bucket_days in BUCKET_DAYS.items():
+        if days / bucket_days <= max_points:
+            return frequency
+    return "Y"
+
+##### Agregacja serii do koszyków (początek tygodnia/miesiąca/kwartału/roku): otwarcie, maksimum, minimum, zamknięcie lub średnia #####
+def aggregate_buckets(df: pd.DataFrame, value_column: str, frequency: str, how: str = "ohlc") -> pd.DataFrame:
+    dates = df["effectiveDate"].to_numpy(dtype="datetime64[D]")
+    if frequency == "W":
+        # 1970-01-01 to czwartek - tydzień liczony od poniedziałku
+        buckets = ((dates.astype(np.int64) + 3) // 7 * 7 - 3).astype("datetime64[D]")
+    elif frequency == "Q":
+        months = dates.astype("datetime64[M]").astype(np.int64)
+        buckets = (months // 3 * 3).astype("datetime64[M]").astype("datetime64[D]")
+    else:
+        buckets = dates.astype(f"datetime64[{frequency}]").astype("datetime64[D]")
+    grouped = df.assign(effectiveDate=buckets.astype("datetime64[ns]")).groupby(
+        ["code", "effectiveDate"], observed=True, sort=False)[value_column]
+    if how == "mean":
+        return grouped.mean().reset_index()
+    ohlc = grouped.agg(["first", "max", "min", "last"])
+    ohlc.columns = [f"{value_column}_open", f"{value_column}_high", f"{value_column}_low", value_column]
+    return ohlc.reset_index()
+
+##### Decymacja długiej ramki (code, effectiveDate, wartość) do budżetu `max_points` punktów łącznie #####
+def downsample_frame(df: pd.DataFrame, value_column: str, max_points: int, method: str = "lttb",
+                     how: str = "ohlc") -> pd.DataFrame:
+    if max_points <= 0 or len(df) <= max_points:
+        return df
+    codes = df["code"].to_numpy()
+    series_count = max(1, len(pd.unique(codes)))
+    per_series = max(3, max_points // series_count)
+
+    if method != "lttb" or how == "mean":
+        dates = df["effectiveDate"]
+        frequency = bucket_frequency((dates.max() - dates.min()).days + 1, per_series)
+        if frequency != "D":
+            df = aggregate_buckets(df, value_column, frequency, how)
+        if len(df) <= max_points or how == "mean":
+            return df
+
+    # LTTB dla każdej serii osobno (pomijając brakujące wartości, np. początek średniej kroczącej)
+    values = df[value_column].to_numpy(dtype=np.float64)
+    x = df["effectiveDate"].to_numpy(dtype="datetime64[ns]").astype(np.int64).astype(np.float64)
+    codes = df["code"].to_numpy()
+    keep = []
+    for code in pd.unique(codes):
+        positions = np.flatnonzero((codes == code) & ~np.isnan(values))
+        keep.append(positions[lttb(x[positions], values[positions], per_series)])
+    return df.iloc[np.sort(np.concatenate(keep))] if keep else df
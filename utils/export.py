@@ -0,0 +1,80 @@
+import gzip
+from typing import BinaryIO, Iterable, Iterator, List, Union
+
+import pandas as pd
+
+from utils.frames import COLUMN_TYPES
+
+##### Zapis paczek danych do pliku bez łączenia ich w pamięci (CSV z kompresją gzip lub Parquet z grupami wierszy) #####
+
+EXPORT_FORMATS = ("csv", "parquet")
+
+##### Rozszerzenie pliku dla formatu eksportu #####
+def export_extension(export_format: str, compress: bool = True) -> str:
+    if export_format == "parquet":
+        return ".parquet"
+    return ".csv.gz" if compress else ".csv"
+
+##### Zapis kolejnych paczek do CSV (nagłówek tylko w pierwszej paczce); zwraca liczbę wierszy #####
+def write_csv(chunks: Iterable[pd.DataFrame], target: Union[str, BinaryIO], compress: bool = True) -> int:
+    rows = 0
+    if compress:
+        handle = gzip.open(target, "wt", encoding="utf-8", newline="")
+    elif isinstance(target, str):
+        handle = open(target, "w", encoding="utf-8", newline="")
+    else:
+        raise Exception("Eksport CSV bez kompresji wymaga ścieżki pliku.")
+    with handle:
+        for chunk in chunks:
+            chunk.to_csv(handle, header=rows == 0, index=False, date_format="%Y-%m-%d")
+            rows += len(chunk)
+    return rows
+
+##### Schemat Arrow dla kolumn wyniku (stały dla wszystkich paczek, niezależnie od ich zawartości) #####
+def arrow_schema(columns: List[str]):
+    import pyarrow as pa
+
+    types = {"category": pa.string(), "object": pa.string(), "datetime64[ns]": pa.timestamp("ns"), "float64": pa.float64()}
+    return pa.schema([(column, types[COLUMN_TYPES.get(column, "object")]) for column in columns])
+
+##### Zapis kolejnych paczek do Parquet (każda paczka jako grupa wierszy); wymaga pakietu pyarrow #####
+def write_parquet(chunks: Iterable[pd.DataFrame], target: Union[str, BinaryIO], columns: List[str],
+                  compression: str = "zstd") -> int:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise Exception("Eksport do formatu Parquet wymaga pakietu pyarrow (pip install pyarrow).")
+
+    schema = arrow_schema(columns)
+    rows = 0
+    with pq.ParquetWriter(target, schema, compression=compression) as writer:
+        for chunk in chunks:
+            # Kategorie różnią się pomiędzy paczkami - zapis jako tekst (Parquet i tak stosuje słownik wartości)
+            data = {column: chunk[column].astype(object) if str(chunk[column].dtype) == "category" else chunk[column]
+                    for column in columns}
+            writer.write_table(pa.Table.from_pandas(pd.DataFrame(data, columns=columns), schema=schema, preserve_index=False))
+            rows += len(chunk)
+    return rows
+
+##### Przekroczony limit wierszy eksportu (np. pobieranie przez przeglądarkę) #####
+class ExportLimitExceeded(Exception):
+    pass
+
+##### Przekazuje paczki do momentu przekroczenia `max_rows` wierszy (wtedy zgłasza ExportLimitExceeded) #####
+def limit_rows(chunks: Iterable[pd.DataFrame], max_rows: int) -> Iterator[pd.DataFrame]:
+    rows = 0
+    for chunk in chunks:
+        rows += len(chunk)
+        if rows > max_rows:
+            raise ExportLimitExceeded(f"Eksport przekracza limit {max_rows} wierszy.")
+        yield chunk
+
+##### Eksport paczek w wybranym formacie; zwraca liczbę zapisanych wierszy #####
+def export_chunks(chunks: Iterable[pd.DataFrame], target: Union[str, BinaryIO], columns: List[str],
+                  export_format: str = "csv", compress: bool = True) -> int:
+    if export_format == "csv":
+        return write_csv(chunks, target, compress)
+    if export_format == "parquet":
+        return write_parquet(chunks, target, columns)
+    raise Exception(f"Nieobsługiwany format eksportu: {export_format}")
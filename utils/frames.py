@@ -0,0 +1,60 @@
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+##### Typy kolumn wyników zapytań o kursy (category / float64 / datetime64 / object) #####
+COLUMN_TYPES: Dict[str, str] = {
+    "table": "category",
+    "no": "object",
+    "effectiveDate": "datetime64[ns]",
+    "tradingDate": "datetime64[ns]",
+    "currency": "category",
+    "code": "category",
+    "mid": "float64",
+    "bid": "float64",
+    "ask": "float64",
+    "value": "float64",
+    "changePct": "float64",
+    "rollingMean": "float64",
+    "rollingStd": "float64",
+}
+
+##### Buduje DataFrame z kolejnych paczek wierszy (fetchmany) bezpośrednio do typowanych kolumn #####
+def frame_from_chunks(chunks: Iterable[list], columns: List[str]) -> pd.DataFrame:
+    parts = {column: [] for column in columns}
+    categories = {column: {} for column in columns if COLUMN_TYPES.get(column) == "category"}
+
+    for chunk in chunks:
+        if not chunk:
+            continue
+        for column, values in zip(columns, zip(*chunk)):
+            kind = COLUMN_TYPES.get(column, "object")
+            if kind == "category":
+                lookup = categories[column]
+                parts[column].append(np.fromiter(
+                    (-1 if value is None else lookup.setdefault(value, len(lookup)) for value in values), dtype=np.int32, count=len(values)))
+            elif kind == "object":
+                parts[column].append(np.array(values, dtype=object))
+            else:
+                parts[column].append(np.array(values, dtype=kind))
+
+    data = {}
+    for column in columns:
+        kind = COLUMN_TYPES.get(column, "object")
+        arrays = parts[column]
+        if kind == "category":
+            codes = np.concatenate(arrays) if arrays else np.empty(0, dtype=np.int32)
+            data[column] = pd.Categorical.from_codes(codes, categories=list(categories[column]))
+        else:
+            data[column] = np.concatenate(arrays) if arrays else np.empty(0, dtype=kind)
+        parts[column] = None
+    return pd.DataFrame(data, columns=columns)
+
+##### Nadaje typy kolumnom gotowego DataFrame (np. wyniku zapytania DuckDB) zgodnie z COLUMN_TYPES #####
+def cast_frame(df: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+    data = {}
+    for column in columns:
+        kind = COLUMN_TYPES.get(column, "object")
+        data[column] = df[column].astype(kind) if kind != "object" else df[column].to_numpy(dtype=object)
+    return pd.DataFrame(data, columns=columns)
@@ -1,26 +1,72 @@
+import json
 from datetime import datetime
-from typing import List
+from functools import lru_cache
+from typing import Iterable, Iterator, List
 from models.rates import Rates
 from models.tables import Tables
+from utils.metrics import timed
+
+##### Konwersja daty "YYYY-MM-DD" (zapamiętywana - te same daty powtarzają się w tabelach A/B/C) #####
+@lru_cache(maxsize=8192)
+def parse_date(value: str) -> datetime:
+    return datetime.fromisoformat(value)
 
 ##### Konwertuje otrzymany JSON na obiekt modelu Tables #####
 def json_to_model(data: dict) -> Tables:
-    rates: List[Rates] = []
-
-    for item in data["rates"]:
-        rate = Rates(
-            currency=item.get("currency"),
-            code=item.get("code"),
-            bid=item.get("bid"),
-            ask=item.get("ask"),
-            mid = item.get("mid")
-        )
-        rates.append(rate)
-
+    trading_date = data.get("tradingDate")
     return Tables(
-        table = data.get("table"),
-        no = data.get("no"),
-        effectiveDate = datetime.strptime(data.get("effectiveDate"), "%Y-%m-%d"),
-        tradingDate = datetime.strptime(data.get("tradingDate"), "%Y-%m-%d") if "tradingDate" in data else None,
-        rates = rates
+        data.get("table"),
+        data.get("no"),
+        parse_date(data["effectiveDate"]),
+        parse_date(trading_date) if trading_date else None,
+        [Rates(item.get("currency"), item.get("code"), item.get("mid"), item.get("bid"), item.get("ask"))
+         for item in data["rates"]],
     )
+
+##### Konwertuje całą odpowiedź API (listę tabel) na obiekty modelu (czas mierzony raz na okno, nie per tabela) #####
+@timed("parse.json_to_models")
+def json_to_models(payload: Iterable[dict]) -> List[Tables]:
+    return [json_to_model(data) for data in payload]
+
+##### Dekoduje przyrostowo tablicę JSON z kolejnych fragmentów tekstu, zwracając jej elementy #####
+def iter_json_array(chunks: Iterable[str]) -> Iterator:
+    decoder = json.JSONDecoder()
+    chunks = iter(chunks)
+    buffer = ""
+    position = 0
+    exhausted = False
+    started = False
+
+    while True:
+        # Pominięcie białych znaków i separatorów pomiędzy elementami
+        while position < len(buffer) and buffer[position] in " \t\r\n,":
+            position += 1
+        if position < len(buffer) and not started:
+            if buffer[position] != "[":
+                raise ValueError("Odpowiedź nie jest tablicą JSON.")
+            started = True
+            position += 1
+            continue
+        if position < len(buffer) and buffer[position] == "]":
+            return
+
+        if position < len(buffer):
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+                # Element kończący się na granicy fragmentu może być niepełny (np. liczba "2." + "5")
+                if exhausted or (end < len(buffer) and buffer[end] in " \t\r\n,]"):
+                    yield item
+                    position = end
+                    continue
+            except json.JSONDecodeError:
+                if exhausted:
+                    raise
+
+        if exhausted:
+            raise ValueError("Niekompletna tablica JSON.")
+        chunk = next(chunks, None)
+        if chunk is None:
+            exhausted = True
+            continue
+        buffer = buffer[position:] + (chunk.decode("utf-8") if isinstance(chunk, bytes) else chunk)
+        position = 0
@@ -2,23 +2,24 @@ import logging
 import os
 from datetime import datetime
 
-import logging, os
-from datetime import datetime
+LOGGER_NAME = "nbp_app"
+
+##### Konfiguracja loggera aplikacji (jednokrotnie na proces - Streamlit wywołuje skrypt przy każdej interakcji) #####
+def init_logger() -> logging.Logger:
+    logger = logging.getLogger(LOGGER_NAME)
+    if logger.handlers:
+        return logger
 
-def init_logger():
     project_root = os.path.dirname(os.path.abspath(__file__))
     log_dir = os.path.join(project_root, "..", "logs")
     os.makedirs(log_dir, exist_ok=True)
 
     log_path = os.path.join(log_dir, f"{datetime.now():%Y-%m-%d}.log")
 
-    file_handler = logging.FileHandler(log_path, encoding="utf-8")
-    console_handler = logging.StreamHandler()
-
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s [%(levelname)s] %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-        handlers=[file_handler, console_handler],
-    )
-    return logging.getLogger("nbp_app")
+    formatter = logging.Formatter("%(asctime)s [%(levelname)s] %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
+    for handler in (logging.FileHandler(log_path, encoding="utf-8"), logging.StreamHandler()):
+        handler.setFormatter(formatter)
+        logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger
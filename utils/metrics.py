@@ -0,0 +1,201 @@
+import cProfile
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Tuple
+
+##### Lekkie metryki wydajności: pomiary czasu (sekcje, funkcje), liczniki, zapis do pliku Prometheus/JSON #####
+
+##### Klucz metryki: nazwa i posortowane etykiety #####
+MetricKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+class Timer:
+    ##### Pomiar czasu sekcji (menedżer kontekstu) lub funkcji (dekorator, również generatory) #####
+    def __init__(self, registry: "MetricsRegistry", name: str, labels: Dict[str, str]):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+        self.started = []
+
+    def __enter__(self):
+        self.started.append(time.perf_counter())
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.observe(self.name, time.perf_counter() - self.started.pop(), error=exc_type is not None, **self.labels)
+        return False
+
+    def __call__(self, func):
+        if inspect.isgeneratorfunction(func):
+            # Generator mierzony łącznie z odczytem wszystkich elementów
+            @functools.wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                failed = False
+                try:
+                    yield from func(*args, **kwargs)
+                except BaseException:
+                    failed = True
+                    raise
+                finally:
+                    self.registry.observe(self.name, time.perf_counter() - started, error=failed, **self.labels)
+            return generator_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            failed = False
+            try:
+                return func(*args, **kwargs)
+            except BaseException:
+                failed = True
+                raise
+            finally:
+                self.registry.observe(self.name, time.perf_counter() - started, error=failed, **self.labels)
+        return wrapper
+
+class MetricsRegistry:
+    ##### Rejestr metryk procesu (bezpieczny dla wątków) #####
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timers: Dict[MetricKey, list] = {}
+        self.counters: Dict[MetricKey, float] = {}
+        self.enabled = True
+        self.path = None
+        self.write_interval_seconds = 60
+        self.written_at = 0.0
+        self.profile_path = None
+
+    ##### Konfiguracja na podstawie sekcji "metrics" z appsettings.json #####
+    def configure(self, settings: dict):
+        metrics_settings = settings.get("metrics", {})
+        profile_settings = metrics_settings.get("profile", {})
+        self.enabled = metrics_settings.get("enabled", True)
+        self.path = metrics_settings.get("path")
+        self.write_interval_seconds = metrics_settings.get("write_interval_seconds", 60)
+        self.profile_path = profile_settings.get("path", "logs/profiles") if profile_settings.get("enabled", False) else None
+
+    @staticmethod
+    def key(name: str, labels: Dict[str, str]) -> MetricKey:
+        return name, tuple(sorted((label, str(value)) for label, value in labels.items()))
+
+    ##### Pomiar czasu: `with timed("nazwa"):` lub `@timed("nazwa")` #####
+    def timed(self, name: str, **labels) -> Timer:
+        return Timer(self, name, labels)
+
+    ##### Zapis pojedynczego pomiaru (liczba, suma, maksimum, błędy) #####
+    def observe(self, name: str, seconds: float, error: bool = False, **labels):
+        if not self.enabled:
+            return
+        key = self.key(name, labels)
+        with self.lock:
+            timer = self.timers.get(key)
+            if timer is None:
+                timer = self.timers[key] = [0, 0.0, 0.0, 0]
+            timer[0] += 1
+            timer[1] += seconds
+            timer[2] = max(timer[2], seconds)
+            timer[3] += error
+
+    ##### Zwiększa licznik (np. wczytane wiersze, przesłane bajty, trafienia pamięci podręcznej) #####
+    def increment(self, name: str, value: float = 1, **labels):
+        if not self.enabled:
+            return
+        key = self.key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    ##### Kopia metryk jako słownik (format JSON) #####
+    def snapshot(self) -> dict:
+        with self.lock:
+            timers = {key: list(value) for key, value in self.timers.items()}
+            counters = dict(self.counters)
+        return {
+            "timers": [{"name": name, "labels": dict(labels), "count": count, "total_seconds": total,
+                        "avg_seconds": total / count if count else 0.0, "max_seconds": longest, "errors": errors}
+                       for (name, labels), (count, total, longest, errors) in sorted(timers.items())],
+            "counters": [{"name": name, "labels": dict(labels), "value": value}
+                         for (name, labels), value in sorted(counters.items())],
+        }
+
+    ##### Metryki w formacie tekstowym Prometheus #####
+    def to_prometheus(self) -> str:
+        def labels_text(name: str, labels: dict) -> str:
+            pairs = [("name", name)] + list(labels.items())
+            return "{" + ",".join(f'{label}="{str(value).replace(chr(34), chr(39))}"' for label, value in pairs) + "}"
+
+        snapshot = self.snapshot()
+        lines = [
+            "# TYPE nbp_timer_seconds_count counter",
+            "# TYPE nbp_timer_seconds_sum counter",
+            "# TYPE nbp_timer_seconds_max gauge",
+            "# TYPE nbp_timer_errors counter",
+        ]
+        for timer in snapshot["timers"]:
+            labels = labels_text(timer["name"], timer["labels"])
+            lines.append(f"nbp_timer_seconds_count{labels} {timer['count']}")
+            lines.append(f"nbp_timer_seconds_sum{labels} {timer['total_seconds']:.6f}")
+            lines.append(f"nbp_timer_seconds_max{labels} {timer['max_seconds']:.6f}")
+            lines.append(f"nbp_timer_errors{labels} {timer['errors']}")
+        lines.append("# TYPE nbp_counter counter")
+        for counter in snapshot["counters"]:
+            lines.append(f"nbp_counter{labels_text(counter['name'], counter['labels'])} {counter['value']}")
+        return "\n".join(lines) + "\n"
+
+    ##### Zapis metryk do pliku (.json - JSON, w pozostałych przypadkach format Prometheus) #####
+    def write(self, path: str = None):
+        path = path or self.path
+        if not path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        content = json.dumps(self.snapshot(), indent=2) if path.endswith(".json") else self.to_prometheus()
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(temp_path, path)
+        self.written_at = time.monotonic()
+
+    ##### Zapis metryk nie częściej niż co `write_interval_seconds` #####
+    def maybe_write(self):
+        if self.path and time.monotonic() - self.written_at >= self.write_interval_seconds:
+            self.write()
+
+    ##### Profilowanie sekcji cProfile (włączane w appsettings.json: metrics.profile.enabled) #####
+    @contextmanager
+    def profiled(self, name: str):
+        if not self.profile_path:
+            yield
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Inny profiler jest już aktywny (np. równoległa sesja) - sekcja bez profilowania
+            yield
+            return
+        try:
+            yield
+        finally:
+            profiler.disable()
+            os.makedirs(self.profile_path, exist_ok=True)
+            profiler.dump_stats(os.path.join(self.profile_path, f"{name}-{datetime.now():%Y%m%d-%H%M%S-%f}.prof"))
+
+##### Rejestr współdzielony przez cały proces #####
+registry = MetricsRegistry()
+timed = registry.timed
+increment = registry.increment
+
+##### Dekorator klasy: pomiar czasu publicznych metod instancji (lub wskazanych w `methods`) jako "<prefix>.<metoda>" #####
+def instrument_methods(prefix: str, methods=None, **labels):
+    def decorate(cls):
+        for attribute, value in list(vars(cls).items()):
+            if attribute.startswith("_") or not inspect.isfunction(value) or (methods is not None and attribute not in methods):
+                continue
+            setattr(cls, attribute, timed(f"{prefix}.{attribute}", **labels)(value))
+        return cls
+    return decorate
@@ -1,11 +1,56 @@
+from contextlib import closing
 from logging import Logger
+import os
+import tempfile
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 from datetime import date, timedelta
 
-from services.api_service import ApiService
-from services.sql_service import SqlService
+from services.aggregate_service import aggregates_enabled
+from services.plot_cache import PlotCache
+from services.rate_store import RateStore
+from services.read_cache import ReadCache
+from services.storage_factory import create_storage
+from services.storage_service import DATA_COLUMN_NAMES
+from utils.analytics import RateMatrix
+from utils.downsampling import downsample_frame, lttb
+from utils.export import ExportLimitExceeded, export_chunks, export_extension, limit_rows
+from utils.metrics import timed
+
+##### Wykresy, które mogą korzystać z gotowych statystyk dziennych (NBP.DailyStats) #####
+STATS_PLOTS = ("Zmiana dzienna (%)", "Średnia krocząca (7 dni)", "Odchylenie (7 dni)")
+
+##### Pamięć podręczna odczytów współdzielona przez wszystkie sesje w procesie serwera #####
+@st.cache_resource
+def get_read_cache(_settings: dict, connection_string: str) -> ReadCache:
+    read_cache_settings = _settings.get("read_cache", {})
+    return ReadCache(
+        create_storage(_settings),
+        read_cache_settings.get("version_check_seconds", 30),
+        read_cache_settings.get("max_entries", 128),
+    )
+
+##### Magazyn kursów w pamięci procesu (wczytywany jednokrotnie z migawki lub bazy, odświeżany przyrostowo) #####
+@st.cache_resource
+def get_rate_store(_settings: dict, _storage, connection_string: str) -> RateStore:
+    rate_store_settings = _settings.get("rate_store", {})
+    rate_store = RateStore(_storage, _settings["exchanges"], rate_store_settings.get("version_check_seconds", 30))
+    snapshot_path = rate_store_settings.get("snapshot_path")
+    if snapshot_path and rate_store.load_snapshot(snapshot_path):
+        rate_store.refresh(force=True)
+    else:
+        rate_store.load()
+    if snapshot_path:
+        rate_store.save_snapshot(snapshot_path)
+    return rate_store
+
+##### Pamięć podręczna obliczeń wykresów (segmenty per typ kursu i waluta) współdzielona przez sesje w procesie #####
+@st.cache_resource
+def get_plot_cache(_settings: dict, _storage, connection_string: str) -> PlotCache:
+    plot_cache_settings = _settings.get("plot_cache", {})
+    return PlotCache(_storage, plot_cache_settings.get("max_megabytes", 256) * 2 ** 20,
+                     plot_cache_settings.get("version_check_seconds", 30))
 
 class MainView:
     ##### Konstruktor widoku #####
@@ -13,39 +58,87 @@ class MainView:
         self.df = None
         self.settings = settings
         self.logger = logger
-        self.sql_service = SqlService(settings["database"]["connection_string"])
-        self.api_service = ApiService(settings["nbp_api"]["base_url"])
+        self.read_cache = get_read_cache(settings, settings["database"]["connection_string"])
+        self.storage = self.read_cache.storage
+        self.rate_store = None
+        self.plot_cache = None
+        if settings.get("plot_cache", {}).get("enabled", False):
+            self.plot_cache = get_plot_cache(settings, self.storage, settings["database"]["connection_string"])
+
+        try:
+            if settings.get("rate_store", {}).get("enabled", False):
+                self.rate_store = get_rate_store(settings, self.storage, settings["database"]["connection_string"])
+                snapshot_path = settings["rate_store"].get("snapshot_path")
+                # Migawka aktualizowana po każdym odświeżeniu - ponowne uruchomienie doczyta jedynie nowe tabele
+                if self.rate_store.refresh() and snapshot_path:
+                    self.rate_store.save_snapshot(snapshot_path)
+        except Exception as ex:
+            self.logger.exception(f"Błąd podczas wczytywania kursów do pamięci: {ex}")
 
         try:
-            self.update_data()
-            self.currencies = self.sql_service.get_currencies()
+            self.currencies = self.read_cache.get_currencies()
         except Exception as ex:
             self.logger.exception(f"Błąd podczas inicjalizacji widoku menu: {ex}")
             st.error("Wystąpił błąd podczas inicjalizacji widoku menu.")
 
-    ##### Metoda aktualizująca dane w bazie #####
-    def update_data(self):
+    ##### Zwraca gotową kolumnę statystyk dziennych (jeśli została pobrana) lub wylicza ją na bieżąco #####
+    ##### Pierwsze `leading` notowania są maskowane - wynik jak przy obliczeniu na samym zakresie dat #####
+    @staticmethod
+    def precomputed(frame, column: str, compute, matrix: RateMatrix, leading: int):
+        if column in frame.columns:
+            return matrix.mask_leading(frame[column].to_numpy(dtype=float), leading)
+        return compute()
+
+    ##### Redukuje liczbę punktów serii do budżetu z sekcji "downsampling" (obliczenia wykonywane są na pełnych danych) #####
+    def decimate(self, frame, column: str, how: str = "ohlc"):
+        downsampling = self.settings.get("downsampling", {})
+        if not downsampling.get("enabled", False):
+            return frame
+        return downsample_frame(frame, column, downsampling.get("max_points", 5000), downsampling.get("method", "lttb"), how)
+
+    ##### Wyświetla tabelę danych stronami (do przeglądarki trafia jedynie bieżąca strona) #####
+    def render_dataframe(self, frame):
+        page_size = self.settings.get("downsampling", {}).get("page_size", 500)
+        pages = max(1, -(-len(frame) // page_size))
+        page = st.number_input(f"Strona (z {pages}):", min_value=1, max_value=pages, value=1, step=1) if pages > 1 else 1
+        st.dataframe(frame.iloc[(page - 1) * page_size:page * page_size])
+        st.caption(f"Rekordy {(page - 1) * page_size + 1}-{min(page * page_size, len(frame))} z {len(frame)}.")
+
+    ##### Eksport pełnego wyniku zapytania do pliku tymczasowego (paczki z kursora) i przycisk pobrania #####
+    ##### Przycisk pobrania przekazuje cały plik w pamięci - większe eksporty wykonywane są poleceniem export.py #####
+    def render_export(self, exchange_type: str, start_date: date, end_date: date, currencies: list):
+        export_settings = self.settings.get("export", {})
+        export_format = export_settings.get("format", "csv")
+        max_rows = export_settings.get("max_download_rows", 500000)
+        extension = export_extension(export_format)
+        if not st.button(f"Przygotuj plik ({export_format.upper()})"):
+            return
+
+        handle, path = tempfile.mkstemp(suffix=extension)
+        os.close(handle)
         try:
-            for table_char in self.settings.get("tables", ["A", "B", "C"]):
-                date_from = (self.sql_service.get_last_date(table_char) + timedelta(days=1)).date()
-                date_to = date.today()
-                if date_from > date_to:
-                    continue
-                tables = self.api_service.get_table_models(table_char, date_from.strftime("%Y-%m-%d"), date_to.strftime("%Y-%m-%d"))
-                if not tables:
-                    continue
-                self.logger.info(f"Pobrano {len(tables)} tabeli {table_char} z API (od {date_from} do {date_to}).")
-                for table in tables:
-                    if self.sql_service.table_exists(table):
-                        continue
-                    id = self.sql_service.insert_table(table)
-                    for rate in table.rates:
-                        if self.sql_service.rate_exists(rate):
-                            continue
-                        self.sql_service.insert_rate(id, rate)
-        except Exception as ex:
-            self.logger.exception(f"Błąd podczas pobierania danych: {ex}")
-            st.error("Wystąpił błąd podczas pobierania danych.")
+            with st.spinner("Eksport danych do pliku..."):
+                chunks = self.storage.iter_data_chunks(exchange_type, start_date, end_date, currencies,
+                                                       DATA_COLUMN_NAMES, export_settings.get("chunk_size", 50000))
+                # Przerwany eksport zamyka kursor od razu (zwolnienie połączenia z puli)
+                with closing(chunks):
+                    rows = export_chunks(limit_rows(chunks, max_rows), path, DATA_COLUMN_NAMES, export_format)
+            self.logger.info(f"Wyeksportowano {rows} rekordów do pliku (od {start_date} do {end_date}).")
+            with open(path, "rb") as f:
+                st.download_button("Pobierz plik", f, file_name=f"nbp_{exchange_type}_{start_date}_{end_date}{extension}")
+        except ExportLimitExceeded:
+            self.logger.info(f"Eksport w aplikacji przekracza limit {max_rows} rekordów (od {start_date} do {end_date}).")
+            st.warning(f"Wynik przekracza {max_rows} rekordów - wykonaj eksport poleceniem: python export.py "
+                       f"--exchange {exchange_type} --date-from {start_date} --date-to {end_date} "
+                       f"--currencies {' '.join(currencies)} --format {export_format}")
+        finally:
+            os.remove(path)
+
+    ##### Wczytanie kursów dla pamięci podręcznej wykresów (magazyn w pamięci lub pamięć podręczna odczytów) #####
+    def load_rates(self, exchange_type: str, date_from: date, date_to: date, currencies: list) -> pd.DataFrame:
+        if self.rate_store is not None:
+            return self.rate_store.query(exchange_type, date_from, date_to, currencies)
+        return self.read_cache.get_data_frame(exchange_type, date_from, date_to, currencies, ["effectiveDate", "code", exchange_type])
 
     ##### Metoda renderująca widok menu #####
     def render(self):
@@ -74,14 +167,37 @@ class MainView:
             st.error("Wystąpił błąd podczas renderowania widoku menu.")
             return
         
+        # Zmiana strony tabeli odświeża skrypt - wynik pozostaje widoczny, dopóki parametry zapytania się nie zmienią
+        query = (exchange_type, start_date, end_date, tuple(selected_currencies or ()), plot_type)
         if download_clicked:
+            st.session_state["query"] = query
+        if download_clicked or st.session_state.get("query") == query:
             try:
                 if selected_currencies is None or len(selected_currencies) == 0:
                     st.warning("Wybierz walutę.")
                     return
 
-                with st.spinner("Pobieranie danych z NBP..."):
-                    rows = self.sql_service.get_data(exchange_type, start_date, end_date, selected_currencies)
+                plot_window = next((p.get("window", 7) for p in self.settings["plot_types"] if p["name"] == plot_type), 7)
+                # NBP.DailyStats odświeżane są przy synchronizacji tylko, gdy pamięć podręczna wykresów jest wyłączona
+                use_stats = aggregates_enabled(self.settings) and plot_type in STATS_PLOTS \
+                    and plot_window == self.settings["aggregates"].get("window", 7)
+
+                # Pamięć podręczna wykresów zwraca kursy i statystyki - pełne kolumny tabeli danych tylko z bazy
+                use_plot_cache = self.plot_cache is not None and (plot_type in STATS_PLOTS or not self.settings.get("show_dataframe", True))
+
+                with st.spinner("Pobieranie danych z NBP..."), timed("render.load", plot=plot_type):
+                    if use_plot_cache:
+                        # Z bazy pobierane są jedynie brakujące waluty i daty; statystyki wyliczane tylko dla nowych notowań
+                        df = self.plot_cache.get(exchange_type, start_date, end_date, selected_currencies, plot_window, self.load_rates)
+                    elif use_stats:
+                        df = self.read_cache.get_daily_stats(exchange_type, start_date, end_date, selected_currencies)
+                        df = df.rename(columns={"value": exchange_type})
+                    elif self.rate_store is not None and not self.settings.get("show_dataframe", True):
+                        df = self.rate_store.query(exchange_type, start_date, end_date, selected_currencies)
+                    else:
+                        # Wykresy potrzebują jedynie daty, kodu waluty i wybranego kursu
+                        columns = None if self.settings.get("show_dataframe", True) else ["effectiveDate", "code", exchange_type]
+                        df = self.read_cache.get_data_frame(exchange_type, start_date, end_date, selected_currencies, columns)
 
                     plot_description = next(
                         (p["description"] for p in self.settings["plot_types"] if p["name"] == plot_type),
@@ -89,16 +205,11 @@ class MainView:
                     )
                     st.info(f"**{plot_type}** — {plot_description}")
                     
-                    if not rows:
+                    if df.empty:
                         st.warning("Brak danych w bazie dla wybranego zakresu.")
                         return
                     
-                    self.df = pd.DataFrame(
-                        rows,
-                        columns=["table", "no", "effectiveDate", "tradingDate",
-                                 "currency", "code", "mid", "bid", "ask"]
-                    )
-                    st.session_state["df"] = self.df
+                    self.df = df
                     self.logger.info(f"Pobrano {len(self.df)} rekordów z bazy danych (od {start_date} do {end_date}).")
                     st.success(f"Pobrane rekordy z bazy danych: {len(self.df)}.")
             except Exception as ex:
@@ -115,142 +226,141 @@ class MainView:
                     st.warning("Brak danych dla wybranych walut.")
                     return
 
-                if plot_type == "Kurs w czasie":
-                    try: 
-                        fig = px.line(
-                            filtered, 
-                            x="effectiveDate", 
-                            y=exchange_type, color="code", 
-                            title=plot_type, 
-                            labels={exchange_type: "Kurs", "effectiveDate": "Data"}
-                        ) 
-                    except Exception as ex: 
-                        self.logger.exception(f"Błąd podczas tworzenia wykresu kursów: {ex}") 
-                        st.error("Wystąpił błąd podczas tworzenia wykresu kursów.") 
-                        return
+                try:
+                    matrix = RateMatrix.from_frame(filtered, exchange_type)
+                    ordered = filtered.iloc[matrix.order]
+                except Exception as ex:
+                    self.logger.exception(f"Błąd podczas przygotowania danych do wykresu: {ex}")
+                    st.error("Wystąpił błąd podczas przygotowania danych do wykresu.")
+                    return
 
-                elif plot_type == "Zmiana dzienna (%)":
-                    try:
-                        filtered = (
-                            filtered.sort_values(["code", "effectiveDate"])
-                            .assign(change_pct=lambda x: x.groupby("code")[exchange_type].pct_change() * 100)
-                        )
-                        fig = px.bar(
-                            filtered,
-                            x="effectiveDate",
-                            y="change_pct",
-                            color="code",
-                            title=plot_type,
-                            labels={"change_pct": "Zmiana [%]", "effectiveDate": "Data"}
-                        )
-                    except Exception as ex:
-                        self.logger.exception(f"Błąd podczas tworzenia wykresu zmiany dziennej: {ex}")
-                        st.error("Wystąpił błąd podczas tworzenia wykresu zmiany dziennej.")
-                        return
+                with timed("render.plot", plot=plot_type):
+                    if plot_type == "Kurs w czasie":
+                        try: 
+                            fig = px.line(
+                                self.decimate(ordered, exchange_type), 
+                                x="effectiveDate", 
+                                y=exchange_type, color="code", 
+                                title=plot_type, 
+                                labels={exchange_type: "Kurs", "effectiveDate": "Data"}
+                            ) 
+                        except Exception as ex: 
+                            self.logger.exception(f"Błąd podczas tworzenia wykresu kursów: {ex}") 
+                            st.error("Wystąpił błąd podczas tworzenia wykresu kursów.") 
+                            return
 
-                elif plot_type == "Średnia krocząca (7 dni)":
-                    try:
-                        filtered = (
-                            filtered.sort_values(["code", "effectiveDate"])
-                            .assign(ma7=lambda x: x.groupby("code")[exchange_type].transform(lambda s: s.rolling(7).mean()))
-                        )
-                        fig = px.line(
-                            filtered,
-                            x="effectiveDate",
-                            y="ma7",
-                            color="code",
-                            title=plot_type,
-                            labels={"ma7": "Średnia 7-dniowa", "effectiveDate": "Data"}
-                        )
-                    except Exception as ex:
-                        self.logger.exception(f"Błąd podczas tworzenia wykresu średniej kroczącej 7 dni: {ex}")
-                        st.error("Wystąpił błąd podczas tworzenia wykresu średniej kroczącej 7 dni.")
-                        return
+                    elif plot_type == "Zmiana dzienna (%)":
+                        try:
+                            filtered = ordered.assign(change_pct=self.precomputed(
+                                ordered, "changePct", lambda: matrix.pct_change() * 100, matrix, 1))
+                            fig = px.bar(
+                                self.decimate(filtered, "change_pct", how="mean"),
+                                x="effectiveDate",
+                                y="change_pct",
+                                color="code",
+                                title=plot_type,
+                                labels={"change_pct": "Zmiana [%]", "effectiveDate": "Data"}
+                            )
+                        except Exception as ex:
+                            self.logger.exception(f"Błąd podczas tworzenia wykresu zmiany dziennej: {ex}")
+                            st.error("Wystąpił błąd podczas tworzenia wykresu zmiany dziennej.")
+                            return
+
+                    elif plot_type == "Średnia krocząca (7 dni)":
+                        try:
+                            filtered = ordered.assign(ma7=self.precomputed(
+                                ordered, "rollingMean", lambda: matrix.rolling_mean(plot_window), matrix, plot_window - 1))
+                            fig = px.line(
+                                self.decimate(filtered, "ma7"),
+                                x="effectiveDate",
+                                y="ma7",
+                                color="code",
+                                title=plot_type,
+                                labels={"ma7": "Średnia 7-dniowa", "effectiveDate": "Data"}
+                            )
+                        except Exception as ex:
+                            self.logger.exception(f"Błąd podczas tworzenia wykresu średniej kroczącej 7 dni: {ex}")
+                            st.error("Wystąpił błąd podczas tworzenia wykresu średniej kroczącej 7 dni.")
+                            return
                 
-                elif plot_type == "Odchylenie (7 dni)":
-                    try:
-                        filtered = (
-                            filtered.sort_values(["code", "effectiveDate"])
-                            .assign(
-                                change=lambda x: x.groupby("code")[exchange_type].pct_change(),
-                                volatility=lambda x: x.groupby("code")["change"].transform(lambda s: s.rolling(7).std() * 100)
+                    elif plot_type == "Odchylenie (7 dni)":
+                        try:
+                            filtered = ordered.assign(volatility=self.precomputed(
+                                ordered, "rollingStd", lambda: matrix.rolling_std(plot_window, matrix.pct_change()) * 100, matrix, plot_window))
+                            fig = px.line(
+                                self.decimate(filtered, "volatility"),
+                                x="effectiveDate",
+                                y="volatility",
+                                color="code",
+                                title=plot_type,
+                                labels={"volatility": "Odchylenie [%]", "effectiveDate": "Data"}
                             )
-                        )
-                        fig = px.line(
-                            filtered,
-                            x="effectiveDate",
-                            y="volatility",
-                            color="code",
-                            title=plot_type,
-                            labels={"volatility": "Odchylenie [%]", "effectiveDate": "Data"}
-                        )
-                    except Exception as ex:
-                        self.logger.exception(f"Błąd podczas tworzenia wykresu odchylenia (7 dni): {ex}")
-                        st.error("Wystąpił błąd podczas tworzenia wykresu odchylenia (7 dni).")
-                        return
-                    
-                elif plot_type == "Relacja walut":
-                    try:
-                        if len(selected_currencies) != 2:
-                            st.warning("Aby zobaczyć relację walut, wybierz dokładnie 2 waluty.")
+                        except Exception as ex:
+                            self.logger.exception(f"Błąd podczas tworzenia wykresu odchylenia (7 dni): {ex}")
+                            st.error("Wystąpił błąd podczas tworzenia wykresu odchylenia (7 dni).")
                             return
+                    
+                    elif plot_type == "Relacja walut":
+                        try:
+                            if len(selected_currencies) != 2:
+                                st.warning("Aby zobaczyć relację walut, wybierz dokładnie 2 waluty.")
+                                return
                         
-                        c1, c2 = selected_currencies
-                        df_pivot = (
-                            filtered.pivot(index="effectiveDate", columns="code", values=exchange_type)
-                            .dropna()
-                        )
-                        df_pivot["ratio"] = df_pivot[c1] / df_pivot[c2]
+                            c1, c2 = selected_currencies
+                            df_pivot = matrix.ratio(c1, c2)
+                            if self.settings.get("downsampling", {}).get("enabled", False):
+                                x = df_pivot.index.to_numpy(dtype="datetime64[ns]").astype("int64").astype(float)
+                                df_pivot = df_pivot.iloc[lttb(x, df_pivot["ratio"].to_numpy(), self.settings["downsampling"].get("max_points", 5000))]
 
-                        fig = px.line(
-                            df_pivot,
-                            x=df_pivot.index,
-                            y="ratio",
-                            title=f"{plot_type} {c1}/{c2}",
-                            labels={"ratio": f"Stosunek {c1}/{c2}", "effectiveDate": "Data"}
-                        )
-                    except Exception as ex:
-                        self.logger.exception(f"Błąd podczas tworzenia wykresu relacji walut: {ex}")
-                        st.error("Wystąpił błąd podczas tworzenia wykresu relacji walut.")
-                        return
+                            fig = px.line(
+                                df_pivot,
+                                x=df_pivot.index,
+                                y="ratio",
+                                title=f"{plot_type} {c1}/{c2}",
+                                labels={"ratio": f"Stosunek {c1}/{c2}", "effectiveDate": "Data"}
+                            )
+                        except Exception as ex:
+                            self.logger.exception(f"Błąd podczas tworzenia wykresu relacji walut: {ex}")
+                            st.error("Wystąpił błąd podczas tworzenia wykresu relacji walut.")
+                            return
                 
-                elif plot_type == "Wskaźnik siły waluty":
-                    try:
-                        filtered = (
-                            filtered.sort_values(["code", "effectiveDate"])
-                            .assign(
-                                strength=lambda x: x.groupby("code")[exchange_type].transform(
-                                    lambda s: s / s.iloc[0] * 100
-                                )
+                    elif plot_type == "Wskaźnik siły waluty":
+                        try:
+                            filtered = ordered.assign(strength=matrix.strength())
+                            fig = px.line(
+                                self.decimate(filtered, "strength"),
+                                x="effectiveDate",
+                                y="strength",
+                                color="code",
+                                title=plot_type,
+                                labels={"strength": "Indeks (100=Start)", "effectiveDate": "Data"}
                             )
-                        )
-                        fig = px.line(
-                            filtered,
-                            x="effectiveDate",
-                            y="strength",
-                            color="code",
-                            title=plot_type,
-                            labels={"strength": "Indeks (100=Start)", "effectiveDate": "Data"}
-                        )
-                    except Exception as ex:
-                        self.logger.exception(f"Błąd podczas tworzenia wskaźnika siły waluty: {ex}")
-                        st.error("Wystąpił błąd podczas tworzenia wskaźnika siły waluty.")
-                        return
+                        except Exception as ex:
+                            self.logger.exception(f"Błąd podczas tworzenia wskaźnika siły waluty: {ex}")
+                            st.error("Wystąpił błąd podczas tworzenia wskaźnika siły waluty.")
+                            return
                     
-                elif plot_type == "Korelacja pomiędzy kursami walut":
-                    try:
-                        corr = filtered.pivot(index="effectiveDate", columns="code", values=exchange_type).corr()
-                        fig = px.imshow(corr, text_auto=True, title=plot_type)
-                    except Exception as ex:
-                        self.logger.exception(f"Błąd podczas tworzenia mapy korelacji: {ex}")
-                        st.error("Wystąpił błąd podczas tworzenia mapy korelacji.")
-                        return
+                    elif plot_type == "Korelacja pomiędzy kursami walut":
+                        try:
+                            corr = matrix.correlation()
+                            fig = px.imshow(corr, text_auto=True, title=plot_type)
+                        except Exception as ex:
+                            self.logger.exception(f"Błąd podczas tworzenia mapy korelacji: {ex}")
+                            st.error("Wystąpił błąd podczas tworzenia mapy korelacji.")
+                            return
 
-                else:
-                    self.logger.exception(f"W aplikacji nie zaimplementowano wykresu: {plot_type}.")
-                    st.error(f"W aplikacji nie zaimplementowano wykresu: {plot_type}.")
-                    return
+                    else:
+                        self.logger.exception(f"W aplikacji nie zaimplementowano wykresu: {plot_type}.")
+                        st.error(f"W aplikacji nie zaimplementowano wykresu: {plot_type}.")
+                        return
 
-                st.plotly_chart(fig, width='stretch')
+                with timed("render.chart", plot=plot_type):
+                    st.plotly_chart(fig, width='stretch')
                 if self.settings.get("show_dataframe", True):
-                    st.dataframe(filtered)
+                    self.render_dataframe(filtered)
+
+                try:
+                    self.render_export(exchange_type, start_date, end_date, selected_currencies)
+                except Exception as ex:
+                    self.logger.exception(f"Błąd podczas eksportu danych do pliku: {ex}")
+                    st.error("Wystąpił błąd podczas eksportu danych do pliku.")